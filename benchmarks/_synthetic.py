@@ -0,0 +1,310 @@
+"""
+Synthetic YAM events database for benchmarks.
+
+The generated database has the same schema as the one built by the indexing module
+(it is created with init_db) and is filled with direct bulk inserts, which is much faster
+than going through add_events_to_db for millions of rows.
+
+Wallet activity follows a Zipf-like distribution, so that a few wallets concentrate most
+of the trades (market makers) while most wallets only have a handful of trades.
+"""
+
+import json
+import os
+import random
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, List
+from eth_utils import to_checksum_address
+from yam_indexing_module.db_operations import init_db
+from yam_indexing_module.db_operations.internal._wallet_trades import _rebuild_wallet_trades
+from yam_indexing_module.db_operations.internal._address_activity import _rebuild_address_activity
+
+BLOCKCHAIN_CONTRACTS_PATH = 'Ressources/blockchain_contracts.json'
+
+FIRST_TIMESTAMP = int(datetime(2022, 1, 1, tzinfo=timezone.utc).timestamp())
+LAST_TIMESTAMP = int(datetime(2025, 12, 31, tzinfo=timezone.utc).timestamp())
+FIRST_BLOCK = 25530394
+INSERT_BATCH_SIZE = 50000
+
+INSERT_OFFER_QUERY = """
+INSERT INTO offers (
+    offer_id, seller_address_id, initial_amount, price_per_unit, offer_token_id, buyer_token_id,
+    block_number, transaction_hash, log_index, creation_timestamp,
+    initial_amount_num, price_per_unit_num
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_OFFER_EVENT_QUERY = """
+INSERT INTO offer_events (
+    offer_id, event_type, buyer_address_id, amount_bought, block_number,
+    transaction_hash, log_index, price_bought, event_timestamp,
+    amount_bought_num, price_bought_num
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def load_payment_tokens() -> Dict[str, int]:
+    """Return the payment tokens of blockchain_contracts.json as {checksum address: decimals}."""
+    with open(BLOCKCHAIN_CONTRACTS_PATH, 'r') as f:
+        contracts = json.load(f)['contracts']
+    return {to_checksum_address(contract['address']): contract['decimals'] for contract in contracts.values() if 'decimals' in contract}
+
+
+def make_address(prefix: int, index: int) -> str:
+    """Deterministic checksum address, e.g. make_address(0xaa, 12)."""
+    return to_checksum_address(f"0x{prefix:02x}{index:038x}")
+
+
+def make_transaction_hash(index: int) -> str:
+    return f"0x{index:064x}"
+
+
+def make_wallets(n_wallets: int) -> List[str]:
+    return [make_address(0xaa, i) for i in range(n_wallets)]
+
+
+def make_realtokens(n_realtokens: int) -> List[str]:
+    return [make_address(0xbb, i) for i in range(n_realtokens)]
+
+
+def make_realtokens_data(realtokens: List[str]) -> List[dict]:
+    """RealTokens API data of synthetic realtokens (the fields read by fetch_realtokens and build_token_registry)."""
+    return [
+        {'gnosisContract': address, 'shortName': f"RealToken {i:04d} Example Street", 'fullName': f"RealToken {i:04d} Example Street, Example City, EX 00000"}
+        for i, address in enumerate(realtokens)
+    ]
+
+
+def build_synthetic_db(
+    db_path: str,
+    n_accepted_events: int,
+    n_wallets: int = 20000,
+    n_realtokens: int = 500,
+    seed: int = 42
+) -> None:
+    """
+    Create a synthetic YAM events database.
+
+    Args:
+        db_path: Path of the database to create (an existing file is replaced)
+        n_accepted_events: Number of OfferAccepted events to generate
+        n_wallets: Number of distinct wallets trading
+        n_realtokens: Number of distinct realtokens traded
+        seed: Random seed, the same parameters always produce the same database
+    """
+    rng = random.Random(seed)
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    init_db(db_path)
+
+    wallets = make_wallets(n_wallets)
+    realtokens = make_realtokens(n_realtokens)
+    payment_tokens = list(load_payment_tokens())
+
+    # Zipf-like weights: wallet i trades about 1 / (i + 1) as much as the most active wallet
+    wallet_weights = [1 / (i + 1) for i in range(n_wallets)]
+
+    n_offers = max(1, n_accepted_events // 3)
+    timestamps = sorted(rng.randint(FIRST_TIMESTAMP, LAST_TIMESTAMP) for _ in range(n_offers + n_accepted_events))
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode = OFF")
+    cursor.execute("PRAGMA synchronous = OFF")
+
+    # Addresses are stored once and referenced by their id
+    address_ids = {address: address_id for address_id, address in enumerate(wallets + realtokens + payment_tokens, start=1)}
+    cursor.executemany(
+        "INSERT INTO addresses (address_id, address) VALUES (?, ?)",
+        ((address_id, bytes.fromhex(address[2:])) for address, address_id in address_ids.items())
+    )
+
+    # Offers: mostly sell offers (realtoken for payment token), some purchase offers and exchanges
+    offers = []
+    sellers = rng.choices(wallets, weights=wallet_weights, k=n_offers)
+    for offer_id in range(n_offers):
+        draw = rng.random()
+        if draw < 0.6:
+            offer_token, buyer_token = rng.choice(realtokens), rng.choice(payment_tokens)
+        elif draw < 0.9:
+            offer_token, buyer_token = rng.choice(payment_tokens), rng.choice(realtokens)
+        elif draw < 0.95:
+            offer_token, buyer_token = rng.sample(payment_tokens, 2)
+        else:
+            offer_token, buyer_token = rng.sample(realtokens, 2)
+        initial_amount = rng.randint(10 ** 17, 10 ** 21)
+        price_per_unit = rng.randint(10 ** 5, 10 ** 20)
+        offers.append((
+            offer_id,
+            address_ids[sellers[offer_id]],
+            str(initial_amount),
+            str(price_per_unit),
+            address_ids[offer_token],
+            address_ids[buyer_token],
+            FIRST_BLOCK + offer_id,
+            bytes.fromhex(make_transaction_hash(offer_id)[2:]),
+            0,
+            timestamps[offer_id],
+            float(initial_amount),
+            float(price_per_unit)
+        ))
+    cursor.executemany(INSERT_OFFER_QUERY, offers)
+
+    # Accepted events, inserted by batches to bound memory usage
+    buyers_pool_size = min(n_accepted_events, 1000000)
+    buyers_pool = [address_ids[wallet] for wallet in rng.choices(wallets, weights=wallet_weights, k=buyers_pool_size)]
+    event_batch = []
+    for i in range(n_accepted_events):
+        offer = offers[rng.randrange(n_offers)]
+        transaction_hash = bytes.fromhex(make_transaction_hash(n_offers + i)[2:])
+        amount_bought = rng.randint(10 ** 15, 10 ** 20)
+        event_batch.append((
+            offer[0],
+            'OfferAccepted',
+            buyers_pool[i % buyers_pool_size],
+            str(amount_bought),
+            FIRST_BLOCK + n_offers + i,
+            transaction_hash,
+            1,
+            offer[3],
+            timestamps[n_offers + i],
+            float(amount_bought),
+            offer[11]
+        ))
+        if len(event_batch) >= INSERT_BATCH_SIZE or i == n_accepted_events - 1:
+            cursor.executemany(INSERT_OFFER_EVENT_QUERY, event_batch)
+            event_batch = []
+
+    # Per-wallet trade ledger and address activity, maintained by the indexer at ingest time
+    _rebuild_wallet_trades(cursor)
+    _rebuild_address_activity(cursor)
+
+    cursor.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+
+def build_wallets_db(
+    db_path: str,
+    trades_per_wallet: List[int],
+    n_counterparties: int = 1000,
+    n_realtokens: int = 500,
+    seed: int = 42
+) -> List[str]:
+    """
+    Create a synthetic YAM events database for report benchmarks, with one wallet per number
+    of trades. The trades of a wallet go through the six modes of _get_trade_mode in turn:
+    the wallet creates or accepts a sell offer (modes 1 and 2), creates or accepts a purchase
+    offer (modes 3 and 4), exchanges payment tokens (mode 5) or realtokens (mode 6), with
+    prices and amounts of realistic magnitudes.
+
+    Args:
+        db_path: Path of the database to create (an existing file is replaced)
+        trades_per_wallet: Number of trades of each wallet
+        n_counterparties: Number of distinct wallets trading with the benchmarked wallets
+        n_realtokens: Number of distinct realtokens traded (see make_realtokens)
+        seed: Random seed, the same parameters always produce the same database
+
+    Returns:
+        List[str]: Address of each wallet, in the order of trades_per_wallet
+    """
+    rng = random.Random(seed)
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    init_db(db_path)
+
+    wallets = [make_address(0xaa, i) for i in range(len(trades_per_wallet))]
+    counterparties = [make_address(0xcc, i) for i in range(n_counterparties)]
+    realtokens = make_realtokens(n_realtokens)
+    payment_token_decimals = load_payment_tokens()
+    payment_tokens = list(payment_token_decimals)
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode = OFF")
+    cursor.execute("PRAGMA synchronous = OFF")
+
+    address_ids = {address: address_id for address_id, address in enumerate(wallets + counterparties + realtokens + payment_tokens, start=1)}
+    cursor.executemany(
+        "INSERT INTO addresses (address_id, address) VALUES (?, ?)",
+        ((address_id, bytes.fromhex(address[2:])) for address, address_id in address_ids.items())
+    )
+
+    # Each trade is an offer accepted once
+    offers = []
+    events = []
+    for wallet, n_trades in zip(wallets, trades_per_wallet):
+        for i in range(n_trades):
+            mode = i % 6 + 1
+            counterparty = rng.choice(counterparties)
+            realtoken_price = rng.uniform(20, 120)
+            realtoken_amount = rng.uniform(0.01, 20)
+
+            if mode in (1, 2): # Sell offer: realtoken for a payment token
+                offer_token, buyer_token = rng.choice(realtokens), rng.choice(payment_tokens)
+                amount_bought = int(realtoken_amount * 10 ** 18)
+                price_bought = int(realtoken_price * 10 ** payment_token_decimals[buyer_token])
+            elif mode in (3, 4): # Purchase offer: payment token for a realtoken, priced in realtoken units per payment token unit
+                offer_token, buyer_token = rng.choice(payment_tokens), rng.choice(realtokens)
+                amount_bought = int(realtoken_amount * realtoken_price * 10 ** payment_token_decimals[offer_token])
+                price_bought = int(10 ** 18 / realtoken_price)
+            elif mode == 5: # Exchange between two payment tokens
+                offer_token, buyer_token = rng.sample(payment_tokens, 2)
+                amount_bought = int(rng.uniform(10, 5000) * 10 ** payment_token_decimals[offer_token])
+                price_bought = int(rng.uniform(0.98, 1.02) * 10 ** payment_token_decimals[buyer_token])
+            else: # Exchange between two realtokens
+                offer_token, buyer_token = rng.sample(realtokens, 2)
+                amount_bought = int(realtoken_amount * 10 ** 18)
+                price_bought = int(rng.uniform(0.2, 5) * 10 ** 18)
+
+            # The wallet creates the offer in modes 1 and 3, accepts it in modes 2 and 4, and
+            # is on either side of the exchanges
+            wallet_is_seller = mode in (1, 3) or (mode in (5, 6) and rng.random() < 0.5)
+            seller, buyer = (wallet, counterparty) if wallet_is_seller else (counterparty, wallet)
+
+            offer_id = len(offers)
+            event_timestamp = rng.randint(FIRST_TIMESTAMP + 30 * 86400, LAST_TIMESTAMP)
+            offers.append((
+                offer_id,
+                address_ids[seller],
+                str(amount_bought * 2),
+                str(price_bought),
+                address_ids[offer_token],
+                address_ids[buyer_token],
+                FIRST_BLOCK + offer_id,
+                bytes.fromhex(make_transaction_hash(offer_id)[2:]),
+                0,
+                event_timestamp - rng.randint(0, 30 * 86400),
+                float(amount_bought * 2),
+                float(price_bought)
+            ))
+            events.append((
+                offer_id,
+                'OfferAccepted',
+                address_ids[buyer],
+                str(amount_bought),
+                FIRST_BLOCK + offer_id,
+                bytes.fromhex(make_transaction_hash(offer_id)[2:]),
+                1,
+                str(price_bought),
+                event_timestamp,
+                float(amount_bought),
+                float(price_bought)
+            ))
+
+    for start in range(0, len(offers), INSERT_BATCH_SIZE):
+        cursor.executemany(INSERT_OFFER_QUERY, offers[start:start + INSERT_BATCH_SIZE])
+        cursor.executemany(INSERT_OFFER_EVENT_QUERY, events[start:start + INSERT_BATCH_SIZE])
+
+    # Per-wallet trade ledger and address activity, maintained by the indexer at ingest time
+    _rebuild_wallet_trades(cursor)
+    _rebuild_address_activity(cursor)
+
+    cursor.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+    return wallets
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Page numbering benchmark.
+
+Renders a long synthetic document with the "page x / y" numbering of the reports, once with
+the canvas of print_pdf (deferred page number forms) and once with the previous canvas,
+which kept a copy of the state of every page until the end of the document. Each variant
+runs in its own process, so that its peak RSS can be measured.
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_page_numbering
+    python3 -m benchmarks.bench_page_numbering --pages 2000 --output results.json
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from io import BytesIO
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Flowable, PageBreak, SimpleDocTemplate
+from pdf_generator_module.print_pdf.build_pdf import NumberedCanvas
+
+LINES_PER_PAGE = 45
+
+
+class SnapshotNumberedCanvas(canvas.Canvas):
+    """Previous page numbering canvas: the state of every page is kept and replayed in save()."""
+
+    def __init__(self, *args, **kwargs):
+        super(SnapshotNumberedCanvas, self).__init__(*args, **kwargs)
+        self._saved_page_states = []
+
+    def showPage(self):
+        self._saved_page_states.append(dict(self.__dict__))
+        self._startPage()
+
+    def save(self):
+        total_pages = len(self._saved_page_states)
+        for state in self._saved_page_states:
+            self.__dict__.update(state)
+            self.setFont("Helvetica", 9)
+            self.drawRightString(A4[0] - 0.75 * cm, 0.75 * cm, f"page {self._pageNumber} / {total_pages}")
+            super(SnapshotNumberedCanvas, self).showPage()
+        super(SnapshotNumberedCanvas, self).save()
+
+
+class TextPage(Flowable):
+    """A page worth of table-like text lines, cheap to lay out."""
+
+    def __init__(self, page: int):
+        super().__init__()
+        self.page = page
+
+    def wrap(self, availWidth, availHeight):
+        return availWidth, LINES_PER_PAGE * 16
+
+    def draw(self):
+        self.canv.setFont("Helvetica", 8)
+        for line in range(LINES_PER_PAGE):
+            y = (LINES_PER_PAGE - line - 1) * 16
+            self.canv.drawString(0, y, f"2024-06-01 12:{line:02d}:00   RealToken {self.page}-{line}")
+            self.canv.drawRightString(520, y, f"{self.page * 1.5 + line:,.2f} USDC")
+
+
+CANVASES = {
+    'deferred_forms': NumberedCanvas,
+    'page_state_snapshots': SnapshotNumberedCanvas,
+}
+
+
+def render(variant: str, n_pages: int) -> dict:
+    elements = []
+    for page in range(n_pages):
+        elements.append(TextPage(page))
+        elements.append(PageBreak())
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=34, leftMargin=34, topMargin=36, bottomMargin=36)
+    start_time = time.perf_counter()
+    doc.build(elements, canvasmaker=CANVASES[variant])
+    duration = time.perf_counter() - start_time
+
+    return {
+        'variant': variant,
+        'pages': n_pages,
+        'seconds': round(duration, 3),
+        # ru_maxrss is in KiB on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'pdf_size_kb': round(len(buffer.getvalue()) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Page numbering benchmark")
+    parser.add_argument('--pages', type=int, default=2000, help="number of pages of the document")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--variant', choices=sorted(CANVASES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Child process: render one variant and print its result
+    if args.variant:
+        print(json.dumps(render(args.variant, args.pages)))
+        return
+
+    results = []
+    for variant in CANVASES:
+        completed = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_page_numbering', '--pages', str(args.pages), '--variant', variant],
+            check=True, capture_output=True, text=True
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(f"  {variant:<22} {result['pages']:>6} pages  {result['seconds']:>8.2f} s  peak RSS {result['peak_rss_mb']:>8.1f} MB  PDF {result['pdf_size_kb']:>9.1f} KB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
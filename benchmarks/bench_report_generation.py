@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Report generation benchmark.
+
+Builds (or reuses) a synthetic YAM events database holding one wallet per report size, whose
+trades go through the six classification modes in turn (see build_wallets_db), and the
+RealTokens fixture of its tokens. The report of each wallet is then generated as by the API,
+phase by phase:
+- query: events and totals read from the wallet_trades ledger
+- classify: classification of the events into typed rows (compute stage alone)
+- elements: create_report_elements (classification, formatting and flowables)
+- layout: measurement of the rows of the tables (cheap for the big sections, drawn directly on
+  the canvas, see _make_section_table)
+- build: pages laid out, drawn and written
+
+The rows of each report are then checked against the scalar path (every event classified on
+its own, dates formatted with strftime): the cells of the tables must be identical.
+
+Each report is generated in its own process, so that its peak RSS can be measured. The
+results (with the commit and library versions) can be written as JSON and compared between
+commits.
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_report_generation
+    python3 -m benchmarks.bench_report_generation --trades 10 1000 10000 100000 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from io import BytesIO
+import reportlab
+from eth_utils import to_checksum_address
+from benchmarks._synthetic import BLOCKCHAIN_CONTRACTS_PATH, FIRST_TIMESTAMP, LAST_TIMESTAMP, build_wallets_db, make_realtokens, make_realtokens_data
+from pdf_generator_module.api.services.token_registry import build_token_registry
+from pdf_generator_module.print_pdf import create_report_elements
+from pdf_generator_module.print_pdf.build_pdf import NumberedCanvas, _get_doc_template
+from pdf_generator_module.print_pdf.internals._report_rows import ReportRow, _classify_event, _compute_report_rows, _compute_report_totals
+from pdf_generator_module.print_pdf.internals._tables import _PagedTable
+from pdf_generator_module.print_pdf.internals._utils import _format_buy_sell_row, _format_exchange_row
+from pdf_generator_module.query_db import ConnectionProvider, get_accepted_offers_by_user_datetime, get_accepted_offers_totals_by_user_datetime
+
+N_REALTOKENS = 500
+FIXTURES_FILE_NAME = 'fixtures.json'
+DB_FILE_NAME = 'YAM_events.db'
+REALTOKENS_FILE_NAME = 'realtokens.json'
+
+
+def build_fixtures(workdir: str, trades: list) -> dict:
+    """Build the synthetic database and the RealTokens fixture, and return the description of the fixtures."""
+    os.makedirs(workdir, exist_ok=True)
+    wallets = build_wallets_db(os.path.join(workdir, DB_FILE_NAME), trades, n_realtokens=N_REALTOKENS)
+    with open(os.path.join(workdir, REALTOKENS_FILE_NAME), 'w') as f:
+        json.dump(make_realtokens_data(make_realtokens(N_REALTOKENS)), f)
+
+    fixtures = {'trades': trades, 'wallets': dict(zip(map(str, trades), wallets))}
+    with open(os.path.join(workdir, FIXTURES_FILE_NAME), 'w') as f:
+        json.dump(fixtures, f, indent=2)
+    return fixtures
+
+
+def load_fixtures(workdir: str):
+    try:
+        with open(os.path.join(workdir, FIXTURES_FILE_NAME), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def generate_report(workdir: str, wallet: str, n_trades: int) -> dict:
+    """Generate the report of a wallet over the whole history, timing each phase."""
+    # Token registry built as by the API, from the RealTokens fixture (see fetch_realtokens)
+    with open(os.path.join(workdir, REALTOKENS_FILE_NAME), 'r') as f:
+        realtokens = {to_checksum_address(realtoken['gnosisContract']): realtoken for realtoken in json.load(f)}
+    with open(BLOCKCHAIN_CONTRACTS_PATH, 'r') as f:
+        blockchain_contracts = json.load(f)['contracts']
+    token_registry = build_token_registry(blockchain_contracts, realtokens)
+    connection_provider = ConnectionProvider(os.path.join(workdir, DB_FILE_NAME))
+
+    timings = {}
+    start_time = time.perf_counter()
+    events = get_accepted_offers_by_user_datetime(connection_provider, [wallet], FIRST_TIMESTAMP, LAST_TIMESTAMP)
+    event_totals = get_accepted_offers_totals_by_user_datetime(connection_provider, [wallet], FIRST_TIMESTAMP, LAST_TIMESTAMP)
+    timings['query'] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    buy_rows, sell_rows, exchange_rows = _compute_report_rows(events, token_registry)
+    _compute_report_totals(event_totals)
+    timings['classify'] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    elements = create_report_elements([wallet], "1 January 2022", "31 December 2025", events, event_totals, token_registry)
+    timings['elements'] = time.perf_counter() - start_time
+
+    # The row heights are measured once per table and reused by the build
+    start_time = time.perf_counter()
+    tables = [element for element in elements if isinstance(element, _PagedTable)]
+    for table in tables:
+        table._ensure_measured()
+    timings['layout'] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    buffer = BytesIO()
+    doc = _get_doc_template(buffer)
+    doc.build(elements, canvasmaker=NumberedCanvas)
+    timings['build'] = time.perf_counter() - start_time
+
+    modes = Counter(row.mode for row in buy_rows + sell_rows + exchange_rows)
+    result = {
+        'trades': n_trades,
+        'events': len(events),
+        'rows_per_mode': {str(mode): modes[mode] for mode in range(1, 7)},
+        'pages': doc.page,
+        'pdf_size_kb': round(len(buffer.getvalue()) / 1024, 1),
+        'seconds': {phase: round(duration, 3) for phase, duration in timings.items()},
+        'total_seconds': round(sum(timings.values()), 3),
+        # ru_maxrss is in KiB on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    # Checked once the peak RSS is read, so that the rows of the scalar path are not counted in it
+    result['rows_checked'] = check_rows(events, token_registry)
+    return result
+
+
+def _format_timestamp_scalar(unix_timestamp) -> str:
+    """Date cell as formatted before the per-day cache of _format_timestamp."""
+    return datetime.fromtimestamp(unix_timestamp, timezone.utc).strftime('%d %b %Y %Hh%M').lstrip('0')
+
+
+def _compute_report_rows_scalar(events: list, token_registry: dict) -> tuple:
+    """Rows of _compute_report_rows, with every event classified on its own instead of once per token combination."""
+    buy_rows, sell_rows, exchange_rows = [], [], []
+    for event in events:
+        mode, token, counter_token, table_rows = _classify_event(
+            token_registry, event['offer_type'], event['offer_token'], event['buyer_token'], event['user_role'],
+            buy_rows, sell_rows, exchange_rows
+        )
+        if mode is not None:
+            table_rows.append(ReportRow(
+                event['event_timestamp'], mode, token, counter_token,
+                event['amount'], event['price'], event['total'], event['transaction_hash']
+            ))
+    return buy_rows, sell_rows, exchange_rows
+
+
+def check_rows(events: list, token_registry: dict) -> int:
+    """
+    Check that the formatted rows of the report are the ones of the scalar path, and return
+    the number of rows checked. Raises AssertionError on the first row that differs.
+    """
+    rows_checked = 0
+    tables = zip(
+        ('buy', 'sell', 'exchange'),
+        (_format_buy_sell_row, _format_buy_sell_row, _format_exchange_row),
+        _compute_report_rows(events, token_registry),
+        _compute_report_rows_scalar(events, token_registry)
+    )
+    for table, format_row, rows, scalar_rows in tables:
+        assert len(rows) == len(scalar_rows), f"{table} table: {len(rows)} rows instead of {len(scalar_rows)}"
+        for row, scalar_row in zip(rows, scalar_rows):
+            cells = format_row(row, True)
+            scalar_cells = [_format_timestamp_scalar(scalar_row.event_timestamp)] + format_row(scalar_row, True)[1:]
+            assert cells == scalar_cells, f"{table} table: {cells} instead of {scalar_cells}"
+        rows_checked += len(rows)
+    return rows_checked
+
+
+def get_environment() -> dict:
+    """Commit and versions the results were measured with."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'reportlab': reportlab.Version,
+        'sqlite': sqlite3.sqlite_version,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report generation benchmark")
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'yam_bench_report_generation'), help="directory of the synthetic database and fixtures")
+    parser.add_argument('--trades', type=int, nargs='+', default=[10, 1000, 10000, 100000], help="number of trades of the benchmarked wallets")
+    parser.add_argument('--rebuild', action='store_true', help="rebuild the fixtures even if they exist")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--build-fixtures', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Child process: build the fixtures (the peak RSS of a process is inherited by the processes it starts)
+    if args.build_fixtures:
+        build_fixtures(args.workdir, args.trades)
+        return
+
+    # Child process: generate the report of one wallet and print its result
+    if args.child is not None:
+        fixtures = load_fixtures(args.workdir)
+        print(json.dumps(generate_report(args.workdir, fixtures['wallets'][str(args.child)], args.child)))
+        return
+
+    fixtures = load_fixtures(args.workdir)
+    if args.rebuild or fixtures is None or fixtures['trades'] != args.trades:
+        print(f"Building synthetic fixtures for wallets of {args.trades} trades ({args.workdir})...")
+        start_time = time.perf_counter()
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_report_generation', '--workdir', args.workdir, '--trades', *map(str, args.trades), '--build-fixtures'],
+            check=True
+        )
+        print(f"Fixtures built in {time.perf_counter() - start_time:.1f}s")
+
+    results = []
+    for n_trades in args.trades:
+        completed = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_report_generation', '--workdir', args.workdir, '--child', str(n_trades)],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            sys.exit(f"Report of the wallet of {n_trades} trades failed:\n{completed.stderr}")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results.append(result)
+        phases = '  '.join(f"{phase} {duration:>7.2f}" for phase, duration in result['seconds'].items())
+        print(f"  {result['trades']:>7} trades  {result['pages']:>5} pages  {phases}  total {result['total_seconds']:>7.2f} s  peak RSS {result['peak_rss_mb']:>7.1f} MB  {result['rows_checked']} rows checked")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': get_environment(), 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
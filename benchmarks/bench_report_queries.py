@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Query plan regression benchmark for the report queries.
+
+Builds (or reuses) a synthetic multi-million-row YAM events database, checks with
+EXPLAIN QUERY PLAN that the report query is still answered by range scans on the
+primary key of the wallet_trades ledger, and times it for wallets of different activity levels.
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_report_queries
+    python3 -m benchmarks.bench_report_queries --events 5000000 --rebuild --output results.json
+
+The exit code is 1 if the query plan does not match the expected plan.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from benchmarks._synthetic import build_synthetic_db, make_wallets
+from pdf_generator_module.query_db import ConnectionProvider, get_accepted_offers_by_user_datetime
+from pdf_generator_module.query_db.get_accepted_offers_by_user_datetime import ACCEPTED_OFFERS_BY_USER_DATETIME_QUERY
+
+# Each entry must appear in the query plan
+EXPECTED_PLAN_DETAILS = [
+    'SEARCH wallet_trades USING PRIMARY KEY (wallet_id=? AND event_timestamp>? AND event_timestamp<?)',
+]
+
+# No entry may appear in the query plan
+FORBIDDEN_PLAN_DETAILS = [
+    'SCAN wallet_trades',
+    'SCAN offer_events',
+    'SCAN offers',
+    'SCAN addresses',
+]
+
+DATE_RANGES = {
+    'full_history': (datetime(2022, 1, 1, tzinfo=timezone.utc), datetime(2025, 12, 31, 23, 59, 59, tzinfo=timezone.utc)),
+    'tax_year': (datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 12, 31, 23, 59, 59, tzinfo=timezone.utc)),
+}
+
+
+def get_query_plan(db_path: str) -> list:
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"EXPLAIN QUERY PLAN {ACCEPTED_OFFERS_BY_USER_DATETIME_QUERY}",
+            # The synthetic wallets are the first registered addresses: ids 1 and 2 are two wallets
+            {'user_address_ids': json.dumps([1, 2]), 'from_datetime': 0, 'to_datetime': 0}
+        )
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def check_query_plan(plan_details: list) -> list:
+    """Return the list of plan regressions (empty if the plan is the expected one)."""
+    regressions = []
+    for expected in EXPECTED_PLAN_DETAILS:
+        if not any(detail.startswith(expected) for detail in plan_details):
+            regressions.append(f"missing: {expected}")
+    for forbidden in FORBIDDEN_PLAN_DETAILS:
+        for detail in plan_details:
+            if detail.startswith(forbidden):
+                regressions.append(f"unexpected: {detail}")
+    return regressions
+
+
+def time_query(db_path: str, user_addresses: list, from_datetime: datetime, to_datetime: datetime, repeat: int) -> dict:
+    connection_provider = ConnectionProvider(db_path)
+    durations = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        events = get_accepted_offers_by_user_datetime(connection_provider, user_addresses, from_datetime, to_datetime)
+        durations.append(time.perf_counter() - start_time)
+    return {
+        'rows': len(events),
+        'min_ms': round(min(durations) * 1000, 3),
+        'median_ms': round(statistics.median(durations) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report query plan regression benchmark")
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'yam_bench_report_queries.db'), help="synthetic database path")
+    parser.add_argument('--events', type=int, default=2000000, help="number of OfferAccepted events in the synthetic database")
+    parser.add_argument('--wallets', type=int, default=20000, help="number of distinct wallets in the synthetic database")
+    parser.add_argument('--rebuild', action='store_true', help="rebuild the synthetic database even if it exists")
+    parser.add_argument('--repeat', type=int, default=5, help="number of runs per timed query")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.rebuild or not os.path.exists(args.db):
+        print(f"Building synthetic database with {args.events} accepted events ({args.db})...")
+        start_time = time.perf_counter()
+        build_synthetic_db(args.db, args.events, n_wallets=args.wallets)
+        print(f"Synthetic database built in {time.perf_counter() - start_time:.1f}s")
+
+    plan_details = get_query_plan(args.db)
+    print("\nQuery plan:")
+    for detail in plan_details:
+        print(f"  {detail}")
+
+    regressions = check_query_plan(plan_details)
+
+    # Wallets are sorted by activity: the first one is the most active
+    wallets = make_wallets(args.wallets)
+    wallet_profiles = {
+        'most_active_wallet': [wallets[0]],
+        'median_wallet': [wallets[len(wallets) // 100]],
+        'least_active_wallet': [wallets[-1]],
+        'unknown_wallet': [make_wallets(args.wallets + 1)[-1]],
+        'five_wallets': wallets[10:15],
+    }
+
+    timings = {}
+    print("\nTimings:")
+    for profile, user_addresses in wallet_profiles.items():
+        for range_name, (from_datetime, to_datetime) in DATE_RANGES.items():
+            result = time_query(args.db, user_addresses, from_datetime, to_datetime, args.repeat)
+            timings[f"{profile}/{range_name}"] = result
+            print(f"  {profile:<20} {range_name:<13} {result['rows']:>8} rows  min {result['min_ms']:>9.3f} ms  median {result['median_ms']:>9.3f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'events': args.events,
+                'wallets': args.wallets,
+                'sqlite_version': sqlite3.sqlite_version,
+                'query_plan': plan_details,
+                'plan_regressions': regressions,
+                'timings': timings,
+            }, f, indent=2)
+
+    if regressions:
+        print("\nQuery plan regression detected:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+    print("\nQuery plan OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Report output size benchmark.
+
+Renders a synthetic buy table (styled like the reports, with tx links and small-font payment
+token cells) of increasing sizes, built as in the reports (see _make_section_table), and
+writes it as rendered and with the compact output (objects packed into compressed object
+streams, requires pikepdf). Most of the size of the big reports is made of the link
+annotations of the tx column.
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_report_size
+    python3 -m benchmarks.bench_report_size --rows 500 5000 20000 --output results.json
+"""
+
+import argparse
+import json
+import time
+from pdf_generator_module.print_pdf.build_pdf import build_pdf
+from pdf_generator_module.print_pdf.internals._style import _get_report_template
+from pdf_generator_module.print_pdf.internals._tables import _make_section_table
+from benchmarks.bench_report_tables import make_table_data
+
+
+def render(variant: str, n_rows: int) -> dict:
+    template = _get_report_template(True)
+    rows, style_commands = make_table_data(n_rows)
+    table = _make_section_table(template.buy_sell_header, rows, template.buy_sell_col_widths, style_commands, 7, template.link_style)
+
+    start_time = time.perf_counter()
+    pdf_bytes = build_pdf([table], compact=(variant == 'compact'))
+    duration = time.perf_counter() - start_time
+
+    return {
+        'variant': variant,
+        'rows': n_rows,
+        'seconds': round(duration, 3),
+        'pdf_size_kb': round(len(pdf_bytes) / 1024, 1),
+        'bytes_per_row': round(len(pdf_bytes) / n_rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report output size benchmark")
+    parser.add_argument('--rows', type=int, nargs='+', default=[500, 5000, 20000], help="table sizes to render")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for n_rows in args.rows:
+        for variant in ('default', 'compact'):
+            result = render(variant, n_rows)
+            results.append(result)
+            print(f"  {variant:<8} {result['rows']:>7} rows  {result['seconds']:>8.2f} s  PDF {result['pdf_size_kb']:>10.1f} KB  {result['bytes_per_row']:>6} bytes / row")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
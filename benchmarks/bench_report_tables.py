@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Report table rendering benchmark.
+
+Renders a synthetic buy table (styled like the reports, with tx links and small-font payment
+token cells) of increasing sizes: drawn directly on the canvas (used by the reports for the
+big tables), as page by page chunked LongTables (used for the small tables), and as a single
+ReportLab Table, as the reports were built before. The rendering time of the paged tables
+grows linearly with the number of rows; the single Table is laid out again at each page
+break, so it is only rendered up to --max-single-table-rows rows.
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_report_tables
+    python3 -m benchmarks.bench_report_tables --rows 1000 10000 50000 --output results.json
+"""
+
+import argparse
+import json
+import time
+from io import BytesIO
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+from pdf_generator_module.print_pdf.build_pdf import NumberedCanvas
+from pdf_generator_module.print_pdf.internals._style import _get_common_style, _get_header_style, _get_buy_sell_table_style, _get_columns_width_buy_sell_table, _get_link_style
+from pdf_generator_module.print_pdf.internals._tables import _CanvasTable, _ChunkedTable, _TxLink
+from pdf_generator_module.print_pdf.internals._utils import _format_number, _format_timestamp
+
+HEADER = ['Timestamp', 'Type', 'Realtoken name', 'Amount', 'Price/token', 'Payment token', 'Total price', 'Tx']
+PAYMENT_TOKENS = ['USDC', 'WXDAI', 'ARMMV3WXDAI', 'REUSD']
+
+
+def make_table_data(n_rows: int):
+    """Return the rows (total row included, URL of the tx link in the last column) and the style commands of a synthetic buy table."""
+    rows = []
+    style_commands = _get_common_style() + _get_header_style() + _get_buy_sell_table_style()
+    for i in range(n_rows):
+        payment_token = PAYMENT_TOKENS[i % len(PAYMENT_TOKENS)]
+        rows.append([
+            _format_timestamp(1700000000 + i * 600),
+            'Buy',
+            f"RealToken {i % 500:04d} Example Street",
+            _format_number(1 + (i % 37) / 7),
+            _format_number(50 + (i % 11)),
+            payment_token,
+            _format_number((1 + (i % 37) / 7) * (50 + (i % 11))),
+            f"https://gnosisscan.io/tx/0x{i:064x}",
+        ])
+        if payment_token in ['ARMMV3WXDAI', 'ARMMV3USDC']:
+            style_commands += [
+                ("FONTSIZE", (5, i + 1), (5, i + 1), 6.75),
+                ("TOPPADDING", (5, i + 1), (5, i + 1), 3),
+            ]
+    rows.append(['Total', '', '', '', '', '', _format_number(n_rows * 100.0), ''])
+    return rows, style_commands
+
+
+def render(variant: str, n_rows: int) -> dict:
+    rows, style_commands = make_table_data(n_rows)
+    col_widths = _get_columns_width_buy_sell_table(True)
+    if variant == 'canvas_table':
+        table = _CanvasTable(HEADER, rows, col_widths, style_commands, link_column=7)
+    else:
+        link_style = _get_link_style()
+        if variant == 'chunked_tables':
+            rows = [row[:7] + [_TxLink(row[7], link_style)] for row in rows[:-1]] + rows[-1:]
+            table = _ChunkedTable(HEADER, rows, col_widths, style_commands)
+        else:
+            rows = [row[:7] + [Paragraph(f'<link href="{row[7]}">URL</link>', link_style)] for row in rows[:-1]] + rows[-1:]
+            table = Table([HEADER] + rows, colWidths=col_widths)
+            table.setStyle(TableStyle(style_commands))
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=34, leftMargin=34, topMargin=36, bottomMargin=36)
+    start_time = time.perf_counter()
+    doc.build([table], canvasmaker=NumberedCanvas)
+    duration = time.perf_counter() - start_time
+
+    return {
+        'variant': variant,
+        'rows': n_rows,
+        'pages': doc.page,
+        'seconds': round(duration, 3),
+        'ms_per_1000_rows': round(duration * 1e6 / n_rows, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report table rendering benchmark")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 50000], help="table sizes to render")
+    parser.add_argument('--max-single-table-rows', type=int, default=10000, help="largest table rendered as a single Table")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for n_rows in args.rows:
+        for variant in ('canvas_table', 'chunked_tables', 'single_table'):
+            if variant == 'single_table' and n_rows > args.max_single_table_rows:
+                continue
+            result = render(variant, n_rows)
+            results.append(result)
+            print(f"  {variant:<15} {result['rows']:>7} rows  {result['pages']:>5} pages  {result['seconds']:>8.2f} s  {result['ms_per_1000_rows']:>8.1f} ms / 1000 rows")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,21 @@ if [ ! -f "config.json" ]; then
     exit 1
 fi
 
-# Initialiser le module d'indexation si la base de données n'existe pas
+# Initialiser la base de données si elle n'existe pas : à partir d'une archive
+# (YAM_DB_ARCHIVE, ex. un fichier d'un volume monté) si elle est fournie, sinon en
+# parcourant tout l'historique. Les blocs postérieurs à l'archive sont rattrapés
+# au démarrage du service d'indexation.
 if [ ! -f "YAM_events.db" ]; then
-    echo "Initialisation du module d'indexation..."
-    python3 -m yam_indexing_module.initialize_indexing_module
+    if [ -n "$YAM_DB_ARCHIVE" ] && [ -f "$YAM_DB_ARCHIVE" ]; then
+        echo "Initialisation de la base de données à partir de l'archive $YAM_DB_ARCHIVE..."
+        if ! python3 -m yam_indexing_module.db_operations.bootstrap_db_from_archive "$YAM_DB_ARCHIVE"; then
+            echo "Archive invalide, initialisation du module d'indexation..."
+            python3 -m yam_indexing_module.initialize_indexing_module
+        fi
+    else
+        echo "Initialisation du module d'indexation..."
+        python3 -m yam_indexing_module.initialize_indexing_module
+    fi
 fi
 
 # Démarrer le service d'indexation en arrière-plan
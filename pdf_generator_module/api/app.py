@@ -3,8 +3,10 @@ from flask_cors import CORS
 from .routes import api_bp
 from .services.realtokens_data import start_realtokens_updater
 from pdf_generator_module.logging.logging_config import setup_logging
+from pdf_generator_module.query_db import ConnectionProvider
 import logging
 import json
+import os
 
 def create_app():
     
@@ -31,6 +33,17 @@ def create_app():
     
     # Configuration
     app.config['DB_PATH'] = config['db_path']
+    # Read-only snapshot published by the indexer (optional, the database is read directly otherwise)
+    app.config['SNAPSHOT_PATH'] = config.get('snapshot_path')
+    app.config['CONNECTION_PROVIDER'] = ConnectionProvider(app.config['DB_PATH'], app.config['SNAPSHOT_PATH'])
+    # Serve the statistics of the connection pools on /api/connection-pool (optional, for debugging: not authenticated)
+    app.config['CONNECTION_POOL_STATS_ENDPOINT'] = config.get('connection_pool_stats_endpoint', False)
+    # Number of processes rendering the sections of the big reports, per API worker (optional, rendered by the request worker otherwise)
+    app.config['PDF_RENDER_WORKERS'] = _get_render_workers(config.get('pdf_render_workers', 1))
+    # Size in bytes above which a report being generated is spooled to a temporary file instead of memory (optional)
+    app.config['PDF_SPOOL_MAX_SIZE'] = config.get('pdf_spool_max_size', 4 * 1024 * 1024)
+    # Smaller reports, with their objects packed into compressed object streams (optional, requires pikepdf)
+    app.config['PDF_COMPACT_OUTPUT'] = config.get('pdf_compact_output', False)
     app.config['API_PORT'] = config['api_port']
     app.config['REALTOKENS_API_URL'] = config['realtokens_api_url']
     
@@ -48,4 +61,19 @@ def create_app():
     # Register blueprints
     app.register_blueprint(api_bp, url_prefix='/api')
     
-    return app
\ No newline at end of file
+    return app
+
+
+def _get_render_workers(requested_workers: int) -> int:
+    """
+    Cap the number of render processes of an API worker, so that the render processes of all
+    the API workers do not outnumber the cores. The number of API workers is given by
+    WEB_CONCURRENCY (set by start_api, and read by gunicorn itself).
+    """
+    api_workers = max(1, int(os.environ.get('WEB_CONCURRENCY', 1)))
+    render_workers = min(requested_workers, max(1, (os.cpu_count() or 1) // api_workers))
+    if render_workers < requested_workers:
+        logging.getLogger(__name__).warning(
+            f"pdf_render_workers capped to {render_workers}: {api_workers} API workers on {os.cpu_count()} cores"
+        )
+    return render_workers
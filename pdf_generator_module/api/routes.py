@@ -1,17 +1,25 @@
 from flask import Blueprint, request, jsonify, current_app, send_file
-from datetime import datetime
+from datetime import datetime, timezone
 from web3 import Web3
-import io
+from werkzeug.exceptions import HTTPException
+import tempfile
 import logging
 import json
-from pdf_generator_module.query_db import get_accepted_offers_by_buyer_datetime, get_accepted_offers_by_seller_datetime
-from pdf_generator_module.print_pdf import create_report_elements, build_pdf
+from pdf_generator_module.query_db import get_accepted_offers_by_user_datetime, get_accepted_offers_totals_by_user_datetime, get_address_activity
+from pdf_generator_module.print_pdf import create_report_elements, write_pdf
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
 api_bp = Blueprint('api', __name__)
 
+def _parse_request_datetime(value: str) -> datetime:
+    """Parse an ISO datetime of a request. Datetimes without timezone (as sent by the UI) are taken as UTC."""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
 @api_bp.route('/generate-report', methods=['POST'])
 def generate_report():
     try:
@@ -21,6 +29,10 @@ def generate_report():
         # Log the incoming request with all parameters
         logger.info(f"Report generation requested - Parameters:\n{json.dumps(data, indent=2, default=str)}")
         
+        if not isinstance(data, dict):
+            logger.error(f"Request body is not a JSON object: {type(data)}")
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+
         # Validate required fields
         required_fields = ['start_date', 'end_date', 'event_type', 'user_addresses', 'display_tx_column']
         for field in required_fields:
@@ -38,13 +50,13 @@ def generate_report():
                 user_addresses.append(Web3.to_checksum_address(addr))
             else:
                 logger.error(f"Invalid address provided: {addr}")
-                raise ValueError(f"Invalid address: {addr}")
+                return jsonify({'error': f'Invalid address: {addr}'}), 400
         display_tx_column = data['display_tx_column']
         
-        # Validate date formats
+        # Validate date formats. Dates are converted once here: the DB stores Unix timestamps
         try:
-            datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+            start_datetime = _parse_request_datetime(start_date)
+            end_datetime = _parse_request_datetime(end_date)
         except ValueError as e:
             logger.error(f"Invalid date format provided - start_date: {start_date}, end_date: {end_date}")
             return jsonify({'error': 'Invalid date format. Use ISO datetime format.'}), 400
@@ -62,36 +74,50 @@ def generate_report():
             logger.error(f"display_tx_column is not a boolean: {type(display_tx_column)}")
             return jsonify({'error': 'display_tx_column must be a boolean'}), 400
         
-        # Get blockchain contracts and realtokens from app config
-        blockchain_contracts = current_app.config['BLOCKCHAIN_CONTRACTS']
-        realtokens = current_app.config['REALTOKENS']
+        # Get the token registry (built at startup from blockchain contracts and realtokens) from app config
+        token_registry = current_app.config['TOKEN_REGISTRY']
+
+        # Events where the user is the buyer and/or the seller, ordered by timestamp
+        start_timestamp = int(start_datetime.timestamp())
+        end_timestamp = int(end_datetime.timestamp())
 
-        events_seller = get_accepted_offers_by_seller_datetime(current_app.config['DB_PATH'], user_addresses, start_date, end_date)
-        events_buyer = get_accepted_offers_by_buyer_datetime(current_app.config['DB_PATH'], user_addresses, start_date, end_date)
+        # The range is clamped to the activity of the addresses (first and last trades, maintained
+        # by the indexer), and the events are not read at all when there is no trade in it
+        address_activity = get_address_activity(current_app.config['CONNECTION_PROVIDER'], user_addresses)
+        if address_activity:
+            start_timestamp = max(start_timestamp, min(activity['first_trade_timestamp'] for activity in address_activity))
+            end_timestamp = min(end_timestamp, max(activity['last_trade_timestamp'] for activity in address_activity))
+
+        if not address_activity or start_timestamp > end_timestamp:
+            logger.info(f"No transaction in the requested range for addresses: {user_addresses}")
+            events, event_totals = [], []
+        else:
+            events = get_accepted_offers_by_user_datetime(current_app.config['CONNECTION_PROVIDER'], user_addresses, start_timestamp, end_timestamp)
+            # Totals of the same events, aggregated in the DB
+            event_totals = get_accepted_offers_totals_by_user_datetime(current_app.config['CONNECTION_PROVIDER'], user_addresses, start_timestamp, end_timestamp)
         
         # Format dates for display
-        from_datetime_formatted_string = datetime.fromisoformat(start_date.replace('Z', '+00:00')).strftime("%d %B %Y").lstrip('0')
-        to_datetime_formatted_string = datetime.fromisoformat(end_date.replace('Z', '+00:00')).strftime("%d %B %Y").lstrip('0')
+        from_datetime_formatted_string = start_datetime.strftime("%d %B %Y").lstrip('0')
+        to_datetime_formatted_string = end_datetime.strftime("%d %B %Y").lstrip('0')
 
         # Create elements of the PDF
         elements = create_report_elements(
             user_addresses,
             from_datetime_formatted_string,
             to_datetime_formatted_string,
-            events_buyer,
-            events_seller,
-            blockchain_contracts,
-            realtokens,
+            events,
+            event_totals,
+            token_registry,
             transaction_type_to_display=event_types,
             display_tx_hash=display_tx_column
         )
         
-        # Build the PDF
-        pdf_file = build_pdf(elements)
-        
-        # Create a BytesIO object to serve the PDF
-        pdf_buffer = io.BytesIO(pdf_file)
-        pdf_buffer.seek(0)
+        # Build the PDF. It is spooled to a temporary file on disk once bigger than PDF_SPOOL_MAX_SIZE,
+        # and streamed from there, so that big reports are not held in the memory of the worker
+        pdf_file = tempfile.SpooledTemporaryFile(max_size=current_app.config['PDF_SPOOL_MAX_SIZE'])
+        write_pdf(elements, pdf_file, workers=current_app.config['PDF_RENDER_WORKERS'], compact=current_app.config['PDF_COMPACT_OUTPUT'])
+        pdf_size = pdf_file.tell()
+        pdf_file.seek(0)
         
         # Generate filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d")
@@ -99,17 +125,67 @@ def generate_report():
         
         logger.info(f"Report generated successfully for addresses: {user_addresses}")
         
-        return send_file(
-            pdf_buffer,
+        response = send_file(
+            pdf_file,
             as_attachment=True,
             download_name=filename,
             mimetype='application/pdf'
         )
+        # The size of a file object is not known by send_file
+        response.content_length = pdf_size
+        # The temporary file is deleted once the response is sent (or the client is gone)
+        response.call_on_close(pdf_file.close)
+        return response
         
+    except HTTPException:
+        # Request errors raised by Flask (e.g. a body that is not JSON) keep their status code
+        raise
     except Exception as e:
-        logger.error(f"Error generating report: {str(e)}")
+        # Invalid requests are answered with 400 above: anything raised here is a server error
+        logger.exception(f"Error generating report: {str(e)}")
         current_app.logger.error(f"Error generating report: {str(e)}")
-        return jsonify({'error': f'Internal server error occurred while generating report: {e}'}), 400
+        return jsonify({'error': f'Internal server error occurred while generating report: {e}'}), 500
+
+@api_bp.route('/wallet-activity', methods=['GET'])
+def wallet_activity():
+    """
+    Activity summary of wallet addresses, to validate them before a report is requested.
+    Addresses are passed as repeated 'address' query parameters.
+    """
+    addresses = request.args.getlist('address')
+    if not addresses:
+        return jsonify({'error': 'Missing required parameter: address'}), 400
+
+    user_addresses = []
+    for addr in addresses:
+        if not Web3.is_address(addr):
+            logger.error(f"Invalid address provided: {addr}")
+            return jsonify({'error': f'Invalid address: {addr}'}), 400
+        user_addresses.append(Web3.to_checksum_address(addr))
+
+    activity_by_address = {activity['address']: activity for activity in get_address_activity(current_app.config['CONNECTION_PROVIDER'], user_addresses)}
+
+    wallets = []
+    for address in user_addresses:
+        activity = activity_by_address.get(address)
+        wallets.append({
+            'address': address,
+            'has_activity': activity is not None,
+            'first_trade': datetime.fromtimestamp(activity['first_trade_timestamp'], timezone.utc).isoformat() if activity else None,
+            'last_trade': datetime.fromtimestamp(activity['last_trade_timestamp'], timezone.utc).isoformat() if activity else None,
+            'buyer_trades_count': activity['buyer_trades_count'] if activity else 0,
+            'seller_trades_count': activity['seller_trades_count'] if activity else 0
+        })
+
+    return jsonify({'wallets': wallets})
+
+@api_bp.route('/connection-pool', methods=['GET'])
+def connection_pool_stats():
+    """Statistics of the database connection pool of the worker process answering the request"""
+    # Internal statistics: only served when enabled in the configuration
+    if not current_app.config['CONNECTION_POOL_STATS_ENDPOINT']:
+        return jsonify({'error': 'Endpoint not found'}), 404
+    return jsonify(current_app.config['CONNECTION_PROVIDER'].get_stats())
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
@@ -3,6 +3,7 @@ import threading
 import time
 import logging
 from eth_utils import to_checksum_address, is_address
+from .token_registry import build_token_registry
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
@@ -40,6 +41,7 @@ def start_realtokens_updater(app):
     
     if initial_data:
         app.config['REALTOKENS'] = initial_data
+        app.config['TOKEN_REGISTRY'] = build_token_registry(app.config['BLOCKCHAIN_CONTRACTS'], initial_data)
         logger.info("RealTokens service initialized successfully")
     else:
         logger.error("Failed to initialize RealTokens service - cannot start application")
@@ -53,6 +55,7 @@ def start_realtokens_updater(app):
                 new_data = fetch_realtokens(api_url)
                 if new_data:
                     app.config['REALTOKENS'] = new_data
+                    app.config['TOKEN_REGISTRY'] = build_token_registry(app.config['BLOCKCHAIN_CONTRACTS'], new_data)
                     logger.info("RealTokens data updated successfully (24h periodic update)")
                 else:
                     logger.error("Failed to update RealTokens data (24h periodic update)")
@@ -0,0 +1,45 @@
+import logging
+from typing import Dict
+from eth_utils import to_checksum_address
+from pdf_generator_module.print_pdf.internals._tokens import TokenInfo, PAYMENT_TOKEN, REALTOKEN
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+def build_token_registry(blockchain_contracts: dict, realtokens: dict) -> Dict[str, TokenInfo]:
+    """
+    Build the token registry used to classify YAM events.
+
+    The registry maps every known checksum address to its name and kind
+    (payment token or realtoken), so that lookups are O(1) whatever the number of
+    tracked contracts.
+
+    Args:
+        blockchain_contracts (dict): Content of 'contracts' in Ressources/blockchain_contracts.json
+        realtokens (dict): RealTokens data indexed by checksum gnosis address
+
+    Returns:
+        Dict[str, TokenInfo]: Token information indexed by checksum address
+    """
+    registry = {}
+
+    for address, realtoken in realtokens.items():
+        registry[address] = TokenInfo(
+            name=realtoken.get('shortName', 'Unknown realtoken'),
+            kind=REALTOKEN
+        )
+
+    # Payment tokens take precedence over realtokens. Contracts without decimals
+    # (e.g. the YAM contract itself) are not tokens and are not registered.
+    for name, contract in blockchain_contracts.items():
+        if 'decimals' not in contract:
+            continue
+        registry[to_checksum_address(contract['address'])] = TokenInfo(
+            name=name,
+            kind=PAYMENT_TOKEN
+        )
+
+    logger.info(f"Token registry built - {len(registry)} tokens registered")
+    return registry
+
@@ -1,2 +1,2 @@
 from .create_report_elements import create_report_elements
-from .build_pdf import build_pdf
\ No newline at end of file
+from .build_pdf import build_pdf, write_pdf
\ No newline at end of file
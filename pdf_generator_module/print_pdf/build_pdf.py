@@ -1,66 +1,340 @@
+import os
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
+from typing import BinaryIO, List, Optional, Tuple
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate
+from reportlab.platypus import Flowable, PageBreak, SimpleDocTemplate
+from pdf_generator_module.print_pdf.internals._tables import _PagedTable
 
-def build_pdf(elements, output_filename="transaction_report.pdf"):
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Minimum number of table rows of a report for its sections to be rendered in parallel
+PARALLEL_MIN_ROWS = 5000
+# Number of pages of the slices of the big tables rendered in parallel
+PARALLEL_SLICE_PAGES = 100
+
+# Pool of render processes of this process (i.e. of the API worker), created on its first big
+# report and reused by the next ones
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_key: Optional[Tuple[int, int]] = None # (pid, number of processes) of the pool
+_render_pool_lock = threading.Lock()
+
+# Optional packages already reported missing by this process
+_missing_packages_logged = set()
+
+def build_pdf(elements, output_filename="transaction_report.pdf", workers=1, compact=False):
     """
     Build the PDF report using the elements created in create_report_elements()
-    
+
     Args:
         elements: List of reportlab elements to include in the PDF
         output_filename (str): Name of the output PDF file (optional, for reference)
-    
+        workers (int): Number of processes rendering the sections of big reports (see _build_pdf_parallel)
+        compact (bool): Write the smaller output of _compact_pdf
+
     Returns:
         bytes: The PDF file content as bytes
     """
     # Create a BytesIO buffer to store the PDF in memory
     buffer = BytesIO()
-    
-    # Create the document with the buffer instead of a filename
-    doc = SimpleDocTemplate(
+    write_pdf(elements, buffer, workers, compact)
+
+    # Get the PDF content as bytes
+    pdf_bytes = buffer.getvalue()
+    buffer.close()
+
+    return pdf_bytes
+
+
+def write_pdf(elements, output: BinaryIO, workers=1, compact=False) -> None:
+    """
+    Build the PDF report using the elements created in create_report_elements() and write it
+    to a binary file object, e.g. a temporary file streamed as the response, so that the
+    report is not copied in memory once rendered.
+
+    Args:
+        elements: List of reportlab elements to include in the PDF
+        output: Binary file object the PDF is written to, from its current position
+        workers (int): Number of processes rendering the sections of big reports (see _build_pdf_parallel)
+        compact (bool): Write the smaller output of _compact_pdf
+    """
+    if compact:
+        try:
+            pikepdf = _import_pikepdf()
+        except ImportError as e:
+            # pikepdf not installed: the report is written as rendered
+            _log_missing_package('pikepdf', f"{e} - reports are written as rendered")
+            compact = False
+
+    if not compact:
+        _render_pdf(elements, output, workers)
+        return
+
+    buffer = BytesIO()
+    _render_pdf(elements, buffer, workers)
+    _compact_pdf(pikepdf, buffer, output)
+
+
+def _render_pdf(elements, output: BinaryIO, workers: int) -> None:
+    if workers > 1 and sum(len(element.rows) for element in elements if isinstance(element, _PagedTable)) >= PARALLEL_MIN_ROWS:
+        try:
+            _build_pdf_parallel(elements, workers, output)
+            return
+        except ImportError as e:
+            # pypdf not installed: the report is rendered in this process
+            _log_missing_package('pypdf', f"{e} - big reports are rendered by the request worker")
+        except BrokenProcessPool:
+            # A render process died (nothing has been written yet): the pool is replaced for the
+            # next reports, and this one is rendered in this process
+            _discard_render_pool()
+
+    # Create the document writing into the output file
+    doc = _get_doc_template(output)
+
+    # Build the document with the elements
+    doc.build(
+        elements,
+        canvasmaker=NumberedCanvas
+    )
+
+
+def _compact_pdf(pikepdf, document: BinaryIO, output: BinaryIO) -> None:
+    """
+    Write a rendered document with its objects packed into compressed object streams (PDF 1.5).
+    The page contents are already compressed by ReportLab, but the other objects are written
+    as plain text: mostly the link annotations of the tx column, one per row, which repeat the
+    same keys and URL prefix and make most of the size of the big reports.
+    """
+    document.seek(0)
+    with pikepdf.open(document) as pdf:
+        pdf.save(output, object_stream_mode=pikepdf.ObjectStreamMode.generate, compress_streams=True)
+
+
+def _get_doc_template(buffer: BinaryIO) -> SimpleDocTemplate:
+    return SimpleDocTemplate(
         buffer,
         pagesize=A4,
         rightMargin=34,
         leftMargin=34,
         topMargin=36,
         bottomMargin=36
-    )    
-    
-    # Build the document with the elements
-    doc.build(
-        elements,
-        canvasmaker=NumberedCanvas
     )
-    
-    # Get the PDF content as bytes
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
-    
-    return pdf_bytes
 
 
 class NumberedCanvas(canvas.Canvas):
-    def __init__(self, *args, **kwargs):
-        super(NumberedCanvas, self).__init__(*args, **kwargs)
-        self._saved_page_states = []
+    """
+    Canvas drawing "page x / y" at the bottom right of every page.
+
+    The total number of pages is only known once the last page is drawn. Each page only refers
+    to a form XObject holding its page number, and the forms are drawn in save() once the total
+    is known. Pages are therefore written as soon as they are completed, and no page state is
+    kept: the memory used does not grow with the number of pages.
+    """
 
     def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
+        self.doForm(_get_page_number_form_name(self._pageNumber))
+        super(NumberedCanvas, self).showPage()
 
     def save(self):
-        """Add page info to each page (Page x of y)."""
-        total_pages = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            self.draw_page_number(total_pages)
-            super(NumberedCanvas, self).showPage()
+        """Draw the page number forms (Page x of y), then save the document."""
+        total_pages = self._pageNumber - 1
+        for page in range(1, total_pages + 1):
+            self.beginForm(_get_page_number_form_name(page))
+            self.draw_page_number(page, total_pages)
+            self.endForm()
         super(NumberedCanvas, self).save()
 
-    def draw_page_number(self, total_pages):
-        page = self._pageNumber
+    def draw_page_number(self, page, total_pages):
         text = f"page {page} / {total_pages}"
         self.setFont("Helvetica", 9)
-        self.drawRightString(A4[0] - 0.75 * cm, 0.75 * cm, text)
\ No newline at end of file
+        self.drawRightString(A4[0] - 0.75 * cm, 0.75 * cm, text)
+
+
+def _get_page_number_form_name(page: int) -> str:
+    return f"pageNumber{page}"
+
+
+def _log_missing_package(package: str, message: str) -> None:
+    """Log the warning of a missing optional package once per process, not for every report."""
+    if package not in _missing_packages_logged:
+        _missing_packages_logged.add(package)
+        logger.warning(message)
+
+
+def _import_pikepdf():
+    try:
+        import pikepdf
+    except ImportError as e:
+        raise ImportError("The compact output of the reports requires pikepdf: pip install pikepdf") from e
+    return pikepdf
+
+
+def _import_pypdf():
+    try:
+        import pypdf
+        import pypdf.annotations
+    except ImportError as e:
+        raise ImportError("The parallel rendering of the reports requires pypdf: pip install pypdf") from e
+    return pypdf
+
+
+class _ProbeDone(Exception):
+    pass
+
+
+class _AvailableHeightProbe(Flowable):
+    """Flowable recording the height available where it is laid out, then stopping the build."""
+
+    def wrap(self, availWidth, availHeight):
+        self.available_height = availHeight
+        raise _ProbeDone()
+
+
+def _get_available_height(elements: list) -> float:
+    """Return the height available on the page after laying out elements from the top of a document."""
+    probe = _AvailableHeightProbe()
+    try:
+        _get_doc_template(BytesIO()).build(elements + [probe])
+    except _ProbeDone:
+        pass
+    return probe.available_height
+
+
+def _get_render_units(elements: list) -> List[list]:
+    """
+    Split the elements of a report into lists of elements starting on a new page, rendered as
+    separate documents: the sections separated by page breaks, and the slices of
+    PARALLEL_SLICE_PAGES pages of their big tables. The slices are cut where the pages of the
+    tables end in the report, so that the documents make the same pages as the report.
+    """
+    sections = [[]]
+    for element in elements:
+        if isinstance(element, PageBreak):
+            sections.append([])
+        else:
+            sections[-1].append(element)
+
+    page_height = _get_available_height([])
+    units = []
+    for section in sections:
+        tables = [i for i, element in enumerate(section) if isinstance(element, _PagedTable)]
+        if len(tables) != 1:
+            if section:
+                units.append(section)
+            continue
+
+        # The table of the section is cut at the end of every PARALLEL_SLICE_PAGES pages
+        i = tables[0]
+        table = section[i]
+        page_ends = table._get_page_ends(_get_available_height(section[:i]), page_height)
+        slice_ends = page_ends[PARALLEL_SLICE_PAGES - 1:-1:PARALLEL_SLICE_PAGES] + [page_ends[-1]]
+        slice_starts = [1] + slice_ends[:-1]
+        slices = [table._get_slice(start, end) for start, end in zip(slice_starts, slice_ends)]
+
+        units.append(section[:i] + slices[:1])
+        units.extend([table_slice] for table_slice in slices[1:-1])
+        if len(slices) > 1:
+            units.append(slices[-1:] + section[i + 1:])
+        else:
+            units[-1].extend(section[i + 1:])
+    return units
+
+
+class _LinkRecordingCanvas(canvas.Canvas):
+    """
+    Canvas recording the URL links instead of writing their annotations: the annotations of
+    thousands of tx links are much slower to read back from a document than to create again
+    once the documents are concatenated.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(_LinkRecordingCanvas, self).__init__(*args, **kwargs)
+        self.links = []
+
+    def linkURL(self, url, rect, relative=0, **kwargs):
+        self.links.append((self._pageNumber - 1, tuple(self._absRect(rect, relative)), url))
+
+
+def _render_unit(elements: list) -> Tuple[bytes, list]:
+    """
+    Render elements as a document without page numbers (in a worker process).
+
+    Returns:
+        Tuple[bytes, list]: The document, and its URL links as (page index, rectangle, URL)
+    """
+    buffer = BytesIO()
+    doc = _get_doc_template(buffer)
+    doc.build(elements, canvasmaker=_LinkRecordingCanvas)
+    return buffer.getvalue(), doc.canv.links
+
+
+def _get_page_number_overlay(total_pages: int) -> bytes:
+    """Return a document of total_pages pages holding only the page numbers drawn by NumberedCanvas."""
+    buffer = BytesIO()
+    numbers_canvas = NumberedCanvas(buffer, pagesize=A4)
+    for _ in range(total_pages):
+        numbers_canvas.showPage()
+    numbers_canvas.save()
+    return buffer.getvalue()
+
+
+def _get_render_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the pool of render processes of this process, creating it if needed."""
+    global _render_pool, _render_pool_key
+    with _render_pool_lock:
+        # A pool inherited from the parent process (e.g. gunicorn --preload) is not usable
+        if _render_pool_key != (os.getpid(), workers):
+            if _render_pool is not None and _render_pool_key[0] == os.getpid():
+                _render_pool.shutdown(wait=False)
+            _render_pool = ProcessPoolExecutor(max_workers=workers)
+            _render_pool_key = (os.getpid(), workers)
+        return _render_pool
+
+
+def _discard_render_pool() -> None:
+    global _render_pool, _render_pool_key
+    with _render_pool_lock:
+        if _render_pool is not None and _render_pool_key[0] == os.getpid():
+            _render_pool.shutdown(wait=False)
+        _render_pool = None
+        _render_pool_key = None
+
+
+def _build_pdf_parallel(elements: list, workers: int, output: BinaryIO) -> None:
+    """
+    Build the PDF report by rendering its sections, and the slices of its big tables, in a pool
+    of processes (see _get_render_units). The documents are concatenated in order, then the
+    page numbers of the whole report are stamped on every page.
+
+    The pool is kept for the next reports of this process (see _get_render_pool).
+
+    Args:
+        elements: List of reportlab elements to include in the PDF
+        workers: Number of processes of the pool
+        output: Binary file object the PDF is written to
+    """
+    pypdf = _import_pypdf()
+
+    units = _get_render_units(elements)
+    rendered_units = list(_get_render_pool(workers).map(_render_unit, units))
+
+    writer = pypdf.PdfWriter()
+    for document, links in rendered_units:
+        first_page = len(writer.pages)
+        writer.append(pypdf.PdfReader(BytesIO(document)))
+        for page, rect, url in links:
+            writer.add_annotation(first_page + page, pypdf.annotations.Link(rect=rect, url=url))
+
+    overlay = pypdf.PdfReader(BytesIO(_get_page_number_overlay(len(writer.pages))))
+    for page, number_page in zip(writer.pages, overlay.pages):
+        page.merge_page(number_page)
+        # The merged content is written uncompressed otherwise
+        page.compress_content_streams()
+
+    writer.write(output)
@@ -0,0 +1,67 @@
+from typing import Dict, Optional, Tuple
+from pdf_generator_module.print_pdf.internals._tokens import TokenInfo, REALTOKEN
+
+def _get_trade_mode(offer_type: str, user_role: str) -> int:
+    """
+    Classify a trade of the ledger from the point of view of the user.
+
+    A user can be either a buyer or a seller, and interact with either a sell offer or a purchase offer.
+    This results in four possible modes (exchanged not included) + 2 others modes for exchange:
+    1. The user creates a sell offer          => they are SELLING realtokens.
+    2. The user responds to a sell offer      => they are BUYING realtokens.
+    3. The user creates a purchase offer      => they are BUYING realtokens.
+    4. The user responds to a purchase offer  => they are SELLING realtokens.
+
+    5. The user exchange a payment token against another payment token (e.g. REUSD for USDC)
+    6. The user exchange a realtoken against another realtoken
+
+    Args:
+        offer_type: 'sell', 'purchase', 'payment_exchange' or 'realtoken_exchange' (see the wallet_trades ledger)
+        user_role: 'buyer', 'seller' or 'both'
+
+    Returns:
+        The mode of the trade
+    """
+    user_is_seller = user_role in ('seller', 'both')
+
+    if offer_type == 'payment_exchange':
+        return 5 # Exchange between two "payment token" (e.g. REUSD swapped to USDC)
+    elif offer_type == 'realtoken_exchange':
+        return 6 # Exchange between two Realtokens
+    elif offer_type == 'sell':
+        # The user has created a sell offer -> they are SELLING realtokens.
+        # The user has responded a sell offer -> they are BUYING realtokens.
+        return 1 if user_is_seller else 2
+    else:
+        # The user has created a purchase offer -> they are BUYING realtokens.
+        # The user has responded a purchase offer -> they are SELLING realtokens.
+        return 3 if user_is_seller else 4
+
+
+def _get_event_mode(
+        token_registry: Dict[str, TokenInfo],
+        offer_type: str,
+        offer_token_address: str,
+        buyer_token_address: str,
+        user_role: str
+        ) -> Tuple[Optional[int], Optional[TokenInfo], Optional[TokenInfo]]:
+    """
+    Classify a trade of the ledger (see _get_trade_mode) and get the registry entries of its tokens.
+
+    The indexer considers every token that is not a payment token as a realtoken. Exchanges
+    between two tokens that are not both realtokens of the registry are not reportable.
+
+    Returns:
+        Tuple of the mode (None if the event is not reportable), the offer token and the buyer
+        token registry entries (None for tokens not in the registry)
+    """
+    # Token registry lookups are O(1), whatever the number of tracked contracts
+    offer_token = token_registry.get(offer_token_address)
+    buyer_token = token_registry.get(buyer_token_address)
+
+    mode = _get_trade_mode(offer_type, user_role)
+
+    if mode == 6 and (offer_token is None or offer_token.kind != REALTOKEN or buyer_token is None or buyer_token.kind != REALTOKEN):
+        mode = None
+
+    return mode, offer_token, buyer_token
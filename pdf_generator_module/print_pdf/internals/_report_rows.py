@@ -0,0 +1,148 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from pdf_generator_module.print_pdf.internals._tokens import TokenInfo, get_realtoken
+from pdf_generator_module.print_pdf.internals._classification import _get_event_mode, _get_trade_mode
+
+
+class ReportRow(NamedTuple):
+    """
+    A trade of the report, with the raw values of the ledger. Nothing is formatted here: the
+    rows can be rendered as tables of the PDF report as well as exported in other formats.
+
+    For buy and sell rows, token is the realtoken, counter_token the payment token, price the
+    price per realtoken and total the total price. For exchange rows, token is the token bought,
+    counter_token the token sold, amount the amount bought, price the exchange rate and total
+    the amount sold.
+    """
+    event_timestamp: int
+    mode: int
+    token: TokenInfo
+    counter_token: TokenInfo
+    amount: float
+    price: float
+    total: float
+    transaction_hash: str
+
+
+class ReportTotals(NamedTuple):
+    buy_amount: float
+    buy_total: float
+    sell_amount: float
+    sell_total: float
+
+
+def _compute_report_rows(
+        events: list,
+        token_registry: Dict[str, TokenInfo]
+        ) -> Tuple[List[ReportRow], List[ReportRow], List[ReportRow]]:
+    """
+    Classify the events of the ledger (see _get_trade_mode) into the rows of the buy, sell
+    and exchange tables. Events that are not reportable are left out.
+
+    Args:
+        events: Events ordered by timestamp, as returned by get_accepted_offers_by_user_datetime.
+            Each event appears only once, whatever the side(s) of the trade belonging to the
+            user ('user_role' is 'buyer', 'seller' or 'both')
+        token_registry: Token information indexed by checksum address
+
+    Returns:
+        The buy rows, the sell rows and the exchange rows, in the order of the events
+    """
+    buy_rows = []
+    sell_rows = []
+    exchange_rows = []
+
+    # A report repeats the same few combinations of offer type, tokens and user role: each one
+    # is classified once, and the events are then dispatched with a single dict lookup
+    classifications = {}
+
+    for event in events:
+        key = (event['offer_type'], event['offer_token'], event['buyer_token'], event['user_role'])
+        classification = classifications.get(key)
+        if classification is None:
+            classification = classifications[key] = _classify_event(token_registry, *key, buy_rows, sell_rows, exchange_rows)
+
+        mode, token, counter_token, table_rows = classification
+        if mode is None:
+            continue
+
+        # Amount, price and total are already adjusted by the token decimals (see the wallet_trades ledger)
+        table_rows.append(ReportRow(
+            event['event_timestamp'],
+            mode,
+            token,
+            counter_token,
+            event['amount'],
+            event['price'],
+            event['total'],
+            event['transaction_hash']
+        ))
+
+    return buy_rows, sell_rows, exchange_rows
+
+
+def _classify_event(
+        token_registry: Dict[str, TokenInfo],
+        offer_type: str,
+        offer_token_address: str,
+        buyer_token_address: str,
+        user_role: str,
+        buy_rows: List[ReportRow],
+        sell_rows: List[ReportRow],
+        exchange_rows: List[ReportRow]
+        ) -> Tuple[Optional[int], Optional[TokenInfo], Optional[TokenInfo], Optional[List[ReportRow]]]:
+    """
+    Classify the events of a combination of offer type, tokens and user role (see _get_event_mode).
+
+    Returns:
+        Tuple of the mode, the token and the counter token of the rows (see ReportRow) and the
+        list of rows of their table (all None if the events are not reportable)
+    """
+    mode, offer_token, buyer_token = _get_event_mode(token_registry, offer_type, offer_token_address, buyer_token_address, user_role)
+    if mode is None:
+        return None, None, None, None
+
+    if mode in [1, 2]: # Sell offer
+        token = get_realtoken(token_registry, offer_token_address)
+        counter_token = buyer_token
+    elif mode in [3, 4]: # Purchase offer
+        token = get_realtoken(token_registry, buyer_token_address)
+        counter_token = offer_token
+    elif user_role in ('buyer', 'both'): # Exchange, the user bought the offer token
+        token = offer_token
+        counter_token = buyer_token
+    else: # Exchange, the user sold the offer token
+        token = buyer_token
+        counter_token = offer_token
+
+    if mode in [1, 4]: # User is SELLING realtokens
+        return mode, token, counter_token, sell_rows
+    elif mode in [2, 3]: # User is BUYING realtokens
+        return mode, token, counter_token, buy_rows
+    else: # User is EXCHANGING tokens
+        return mode, token, counter_token, exchange_rows
+
+
+def _compute_report_totals(event_totals: list) -> ReportTotals:
+    """
+    Sum the amounts and the totals of the buy trades and of the sell trades.
+
+    Args:
+        event_totals: Sums of the amounts and totals (adjusted by the token decimals) per (offer type, user role),
+            as returned by get_accepted_offers_totals_by_user_datetime
+
+    Returns:
+        ReportTotals: The totals of the buy and sell tables
+    """
+    buy_amount = buy_total = sell_amount = sell_total = 0.0
+
+    for event_total in event_totals:
+        mode = _get_trade_mode(event_total['offer_type'], event_total['user_role'])
+
+        if mode in [1, 4]: # User is SELLING realtokens
+            sell_amount += event_total['amount_sum']
+            sell_total += event_total['total_sum']
+        elif mode in [2, 3]: # User is BUYING realtokens
+            buy_amount += event_total['amount_sum']
+            buy_total += event_total['total_sum']
+
+    return ReportTotals(buy_amount, buy_total, sell_amount, sell_total)
@@ -1,3 +1,4 @@
+from typing import NamedTuple, Tuple
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib import colors 
 
@@ -183,3 +184,53 @@ def _get_columns_width_exchange_table(display_tx_hash):
 
     return col_widths
 
+
+class ReportTemplate(NamedTuple):
+    """
+    Static parts of a report, built once per process (see _get_report_template): the paragraph
+    styles, the headers, the column widths and the style commands of the tables. The template is
+    shared by all the requests, it must not be modified: the styles of the rows of a report are
+    added to copies of the style commands.
+    """
+    title_style: ParagraphStyle
+    user_addresses_style: ParagraphStyle
+    event_type_subtitle_style: ParagraphStyle
+    link_style: ParagraphStyle
+    buy_sell_header: Tuple[str, ...]
+    exchange_header: Tuple[str, ...]
+    buy_sell_col_widths: Tuple[float, ...]
+    exchange_col_widths: Tuple[float, ...]
+    buy_sell_table_style: Tuple[tuple, ...]
+    exchange_table_style: Tuple[tuple, ...]
+
+
+def _build_report_template(display_tx_hash: bool) -> ReportTemplate:
+    buy_sell_header = ('Timestamp', 'Type', 'Realtoken name', 'Amount', 'Price/token', 'Payment token', 'Total price')
+    exchange_header = ('Timestamp', 'Type', 'Amount', 'Token bought', 'Amount', 'Token sold', 'Rate')
+
+    # Add the Tx column only if it is desired by the user
+    if display_tx_hash:
+        buy_sell_header += ('Tx',)
+        exchange_header += ('Tx',)
+
+    return ReportTemplate(
+        title_style=_get_title_style(),
+        user_addresses_style=_get_user_addresses_style(),
+        event_type_subtitle_style=_get_event_type_subtitle_style(),
+        link_style=_get_link_style(),
+        buy_sell_header=buy_sell_header,
+        exchange_header=exchange_header,
+        buy_sell_col_widths=tuple(_get_columns_width_buy_sell_table(display_tx_hash)),
+        exchange_col_widths=tuple(_get_columns_width_exchange_table(display_tx_hash)),
+        buy_sell_table_style=tuple(_get_common_style() + _get_header_style() + _get_buy_sell_table_style()),
+        exchange_table_style=tuple(_get_common_style() + _get_header_style() + _get_exchange_table_style()),
+    )
+
+
+# Templates of the reports with and without the Tx column, built when the module is imported
+_REPORT_TEMPLATE_WITH_TX = _build_report_template(True)
+_REPORT_TEMPLATE_WITHOUT_TX = _build_report_template(False)
+
+
+def _get_report_template(display_tx_hash: bool) -> ReportTemplate:
+    return _REPORT_TEMPLATE_WITH_TX if display_tx_hash else _REPORT_TEMPLATE_WITHOUT_TX
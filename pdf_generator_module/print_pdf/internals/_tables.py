@@ -0,0 +1,463 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import Flowable, LongTable, TableStyle
+from reportlab.platypus.tables import CellStyle
+
+# Number of rows laid out at once when measuring the row heights
+MEASURE_CHUNK_SIZE = 500
+# Tables of at least this number of rows are drawn directly on the canvas (see _CanvasTable)
+CANVAS_TABLE_MIN_ROWS = 1000
+# Style commands drawing lines, the other commands setting the style of the cells
+LINE_COMMANDS = ('GRID', 'BOX', 'INNERGRID')
+
+
+def _index_style_commands(style_commands: list, n_rows: int) -> Tuple[list, Dict[int, list]]:
+    """
+    Resolve the rows of the style commands of a whole table (negative rows are counted from the
+    last row), and index the commands applying to a single data row by row, so that the commands
+    of a chunk are found without going through the commands of every cell of the table.
+
+    Args:
+        style_commands: TableStyle commands of the whole table (header at row 0)
+        n_rows: Number of rows of the whole table, header included
+
+    Returns:
+        Tuple[list, Dict[int, list]]: Commands spanning several rows or the header, and commands
+        of single data rows indexed by row
+    """
+    spanning_commands = []
+    row_commands = defaultdict(list)
+    for name, (start_col, start_row), (end_col, end_row), *values in style_commands:
+        start_row = start_row if start_row >= 0 else n_rows + start_row
+        end_row = end_row if end_row >= 0 else n_rows + end_row
+        if 0 < start_row == end_row:
+            row_commands[start_row].append((name, start_col, end_col, tuple(values)))
+        else:
+            spanning_commands.append((name, start_col, start_row, end_col, end_row, tuple(values)))
+    return spanning_commands, dict(row_commands)
+
+
+def _get_chunk_style_commands(spanning_commands: list, row_commands: Dict[int, list], start: int, end: int) -> list:
+    """
+    Return the style commands of a chunk made of the header and of the rows [start, end) of a
+    whole table, with rows relative to the chunk (see _index_style_commands).
+    """
+    chunk_commands = []
+    for name, start_col, start_row, end_col, end_row, values in spanning_commands:
+        # The header is repeated at the top of every chunk
+        if start_row == 0:
+            chunk_commands.append((name, (start_col, 0), (end_col, 0), *values))
+            start_row = 1
+
+        first_row = max(start_row, start)
+        last_row = min(end_row, end - 1)
+        if first_row <= last_row:
+            chunk_commands.append((name, (start_col, first_row - start + 1), (end_col, last_row - start + 1), *values))
+
+    for row in range(start, end):
+        for name, start_col, end_col, values in row_commands.get(row, ()):
+            chunk_commands.append((name, (start_col, row - start + 1), (end_col, row - start + 1), *values))
+    return chunk_commands
+
+
+class _PagedTable(Flowable, ABC):
+    """
+    Table of a report section, laid out page by page.
+
+    A single ReportLab Table is laid out again each time it is split over a new page, so its
+    rendering time grows with the square of its number of rows. The rows of a paged table are
+    measured once, and each page gets a part of the table made of the header and of the rows
+    that fit on it: the rendering time grows linearly with the number of rows.
+
+    The style commands are those of the whole table, and are translated for each part.
+    Subclasses measure the rows (_measure_rows) and build the flowable of a part (_make_page):
+    a subclass missing one of them cannot be instantiated.
+    """
+
+    # Attributes shared by the parts of a table (the layout state set by Platypus is not)
+    _shared_attributes = ('header', 'rows', 'col_widths', '_n_rows', '_spanning_commands', '_row_commands', '_header_height', '_cumulated_heights')
+
+    def __init__(self, header: list, rows: list, col_widths: List[float], style_commands: list):
+        """
+        Args:
+            header: Header row, repeated at the top of every page
+            rows: Rows of the table (a total row included)
+            col_widths: Width of each column
+            style_commands: TableStyle commands of the whole table (header at row 0)
+        """
+        super().__init__()
+        # Centered in the frame, as ReportLab Tables
+        self.hAlign = 'CENTER'
+        self.header = header
+        self.rows = rows
+        self.col_widths = col_widths
+        self._n_rows = len(rows) + 1
+        self._spanning_commands, self._row_commands = _index_style_commands(style_commands, self._n_rows)
+        # Height of the header, and cumulated height of the rows 1 to k at index k (0 at index 0)
+        self._header_height = None
+        self._cumulated_heights = None
+        # Rows [start, end) of the whole table in this part
+        self._start = 1
+        self._end = self._n_rows
+
+    @abstractmethod
+    def _measure_rows(self) -> List[float]:
+        """Return the heights of the rows of the whole table, header at index 0."""
+
+    @abstractmethod
+    def _make_page(self, start: int, end: int) -> Flowable:
+        """Return the flowable of the header and of the rows [start, end) of the whole table."""
+
+    def _get_part(self, start: int, end: int) -> '_PagedTable':
+        """Return the part of the table made of the rows [start, end), sharing the rows, styles and measures of this table."""
+        part = type(self).__new__(type(self))
+        Flowable.__init__(part)
+        part.hAlign = self.hAlign
+        for attribute in self._shared_attributes:
+            setattr(part, attribute, getattr(self, attribute))
+        part._start = start
+        part._end = end
+        return part
+
+    def _get_height(self, start: int, end: int) -> float:
+        """Return the height of the header and of the rows [start, end)."""
+        return self._header_height + self._cumulated_heights[end - 1] - self._cumulated_heights[start - 1]
+
+    def _ensure_measured(self) -> None:
+        if self._cumulated_heights is None:
+            row_heights = self._measure_rows()
+            self._header_height = row_heights[0]
+            self._cumulated_heights = list(accumulate(row_heights[1:], initial=0))
+
+    def wrap(self, availWidth, availHeight):
+        self._ensure_measured()
+        self.width = sum(self.col_widths)
+        self.height = self._get_height(self._start, self._end)
+        return self.width, self.height
+
+    def _get_split_end(self, start: int, availHeight: float) -> int:
+        """Return the row after the last row fitting with the header in the available height, from a row."""
+        self._ensure_measured()
+        max_height = availHeight - self._header_height + self._cumulated_heights[start - 1]
+        return min(bisect_right(self._cumulated_heights, max_height, lo=start - 1), self._end)
+
+    def _get_page_ends(self, first_page_height: float, page_height: float) -> List[int]:
+        """
+        Return the row after the last row of each page of the table, as laid out from a page with
+        the first available height, then on pages with the other available height.
+        """
+        page_ends = []
+        start = self._start
+        availHeight = first_page_height
+        while start < self._end:
+            end = self._get_split_end(start, availHeight)
+            # Nothing fits on the first page: the table starts on the next page
+            if end > start:
+                page_ends.append(end)
+                start = end
+            elif availHeight == page_height:
+                raise ValueError("A row of the table is higher than a page")
+            availHeight = page_height
+        return page_ends
+
+    def _get_init_kwargs(self) -> dict:
+        """Return the keyword arguments of the constructor specific to the subclass."""
+        return {}
+
+    def _get_slice(self, start: int, end: int) -> '_PagedTable':
+        """
+        Return a standalone table made of the header and of the rows [start, end) of this table,
+        e.g. to be rendered in another process without the other rows.
+        """
+        return type(self)(
+            self.header,
+            self.rows[start - 1:end - 1],
+            self.col_widths,
+            _get_chunk_style_commands(self._spanning_commands, self._row_commands, start, end),
+            **self._get_init_kwargs()
+        )
+
+    def split(self, availWidth, availHeight):
+        end = self._get_split_end(self._start, availHeight)
+        if end <= self._start:
+            return []
+        if end >= self._end:
+            return [self._make_page(self._start, self._end)]
+        return [self._make_page(self._start, end), self._get_part(end, self._end)]
+
+    def draw(self):
+        page = self._make_page(self._start, self._end)
+        page.wrap(self.width, self.height)
+        page.drawOn(self.canv, 0, 0)
+
+
+class _ChunkedTable(_PagedTable):
+    """
+    Paged table whose pages are ReportLab LongTables.
+
+    The rows are measured by fixed-size chunks, each page being a LongTable of the header and
+    of the rows that fit on it.
+    """
+
+    def _make_page(self, start: int, end: int) -> LongTable:
+        return LongTable(
+            [self.header] + self.rows[start - 1:end - 1],
+            # A list of its own: a Table adjusts its column widths to the columns of its rows
+            colWidths=list(self.col_widths),
+            style=TableStyle(_get_chunk_style_commands(self._spanning_commands, self._row_commands, start, end))
+        )
+
+    def _measure_rows(self) -> List[float]:
+        row_heights = []
+        for start in range(1, self._n_rows, MEASURE_CHUNK_SIZE):
+            table = self._make_page(start, min(start + MEASURE_CHUNK_SIZE, self._n_rows))
+            table.wrap(sum(self.col_widths), float('inf'))
+            if not row_heights:
+                row_heights.append(table._rowHeights[0])
+            row_heights.extend(table._rowHeights[1:])
+        return row_heights
+
+
+class _CanvasTable(_PagedTable):
+    """
+    Paged table drawn directly on the canvas, for the big tables.
+
+    The report tables are regular: fixed column widths and a single line of text per row. The
+    rows are not laid out by ReportLab Tables: the style of each cell is resolved from the same
+    style commands (cached for the rows sharing the same commands), the height of a row follows
+    from the leading and paddings of its cells, and the text, backgrounds and lines are drawn at
+    the computed positions. The tx links are link annotations over the cells of the link column
+    instead of one Paragraph per row.
+    """
+
+    _shared_attributes = _PagedTable._shared_attributes + ('link_column', '_row_style_bounds', '_row_styles')
+
+    def __init__(self, header: list, rows: list, col_widths: List[float], style_commands: list, link_column: Optional[int] = None):
+        """
+        Args:
+            header: Header row, repeated at the top of every page
+            rows: Rows of the table (a total row included)
+            col_widths: Width of each column
+            style_commands: TableStyle commands of the whole table (header at row 0)
+            link_column: Column holding the URL of the tx link of each row, if any
+        """
+        super().__init__(header, rows, col_widths, style_commands)
+        self.link_column = link_column
+        # Rows from which the set of spanning commands applying to a row changes
+        self._row_style_bounds = sorted({0, 1} | {
+            row
+            for _, _, start_row, _, end_row, _ in self._spanning_commands
+            for row in (start_row, end_row + 1)
+        })
+        # Cell styles and height of the rows, by bound and commands of single rows
+        self._row_styles = {}
+
+    def _get_init_kwargs(self) -> dict:
+        return {'link_column': self.link_column}
+
+    def _resolve_col(self, col: int) -> int:
+        return col if col >= 0 else len(self.col_widths) + col
+
+    def _get_row_style(self, row: int) -> Tuple[List[CellStyle], float]:
+        """Return the style of each cell of a row of the whole table, and the height of the row."""
+        bound = self._row_style_bounds[bisect_right(self._row_style_bounds, row) - 1]
+        key = (bound, tuple(self._row_commands.get(row, ())))
+        row_style = self._row_styles.get(key)
+        if row_style is None:
+            base_style = CellStyle('cell')
+            base_style.background = None
+            cell_styles = [CellStyle(f'cell{col}', base_style) for col in range(len(self.col_widths))]
+            commands = [
+                (name, start_col, end_col, values)
+                for name, start_col, start_row, end_col, end_row, values in self._spanning_commands
+                if start_row <= row <= end_row
+            ] + list(key[1])
+            for name, start_col, end_col, values in commands:
+                if name in LINE_COMMANDS:
+                    continue
+                for col in range(self._resolve_col(start_col), self._resolve_col(end_col) + 1):
+                    _set_cell_style(cell_styles[col], name, values)
+            height = max(style.leading + style.topPadding + style.bottomPadding for style in cell_styles)
+            row_style = self._row_styles[key] = (cell_styles, height)
+        return row_style
+
+    def _measure_rows(self) -> List[float]:
+        return [self._get_row_style(row)[1] for row in range(self._n_rows)]
+
+    def _make_page(self, start: int, end: int) -> '_CanvasTable':
+        return self._get_part(start, end)
+
+    def draw(self):
+        canv = self.canv
+        col_positions = list(accumulate(self.col_widths, initial=0))
+        current_font = current_color = None
+
+        y = self.height
+        for row in [0] + list(range(self._start, self._end)):
+            values = self.header if row == 0 else self.rows[row - 1]
+            cell_styles, height = self._get_row_style(row)
+            y -= height
+            for col, (value, style) in enumerate(zip(values, cell_styles)):
+                x = col_positions[col]
+                width = self.col_widths[col]
+                if style.background is not None:
+                    canv.setFillColor(style.background)
+                    canv.rect(x, y, width, height, stroke=0, fill=1)
+                    current_color = None
+
+                if row > 0 and col == self.link_column:
+                    if not value:
+                        continue
+                    canv.linkURL(value, (x, y, x + width, y + height), relative=1)
+                    value = 'URL'
+
+                if (style.fontname, style.fontsize, style.leading) != current_font:
+                    canv.setFont(style.fontname, style.fontsize, style.leading)
+                    current_font = (style.fontname, style.fontsize, style.leading)
+                if style.color != current_color:
+                    canv.setFillColor(style.color)
+                    current_color = style.color
+                _draw_cell_text(canv, str(value), style, x, y, width, height)
+
+        self._draw_lines(col_positions)
+
+    def _draw_lines(self, col_positions: List[float]) -> None:
+        # Top of the header, then bottom of each row of the page
+        row_positions = list(accumulate(
+            [self._header_height] + [
+                self._cumulated_heights[row] - self._cumulated_heights[row - 1]
+                for row in range(self._start, self._end)
+            ],
+            lambda y, height: y - height,
+            initial=self.height
+        ))
+        page_commands = _get_chunk_style_commands(self._spanning_commands, self._row_commands, self._start, self._end)
+        for name, (start_col, start_row), (end_col, end_row), *values in page_commands:
+            if name not in LINE_COMMANDS:
+                continue
+            width, color = values[:2]
+            start_col, end_col = self._resolve_col(start_col), self._resolve_col(end_col)
+            left, right = col_positions[start_col], col_positions[end_col + 1]
+            top, bottom = row_positions[start_row], row_positions[end_row + 1]
+
+            lines = []
+            if name in ('GRID', 'BOX'):
+                lines += [(left, top, right, top), (left, bottom, right, bottom), (left, top, left, bottom), (right, top, right, bottom)]
+            if name in ('GRID', 'INNERGRID'):
+                lines += [(col_positions[col], top, col_positions[col], bottom) for col in range(start_col + 1, end_col + 1)]
+                lines += [(left, row_positions[row], right, row_positions[row]) for row in range(start_row + 1, end_row + 1)]
+            self.canv.setLineWidth(width)
+            self.canv.setStrokeColor(color)
+            self.canv.lines(lines)
+
+
+def _set_cell_style(style: CellStyle, name: str, values: tuple) -> None:
+    """Apply a cell style command of a TableStyle to the style of a cell."""
+    if name == 'FONTNAME':
+        style.fontname = values[0]
+    elif name == 'FONTSIZE':
+        style.fontsize = values[0]
+    elif name == 'LEADING':
+        style.leading = values[0]
+    elif name == 'TEXTCOLOR':
+        style.color = values[0]
+    elif name == 'BACKGROUND':
+        style.background = values[0]
+    elif name == 'ALIGN':
+        style.alignment = values[0]
+    elif name == 'VALIGN':
+        style.valign = values[0]
+    elif name == 'TOPPADDING':
+        style.topPadding = values[0]
+    elif name == 'BOTTOMPADDING':
+        style.bottomPadding = values[0]
+    elif name == 'LEFTPADDING':
+        style.leftPadding = values[0]
+    elif name == 'RIGHTPADDING':
+        style.rightPadding = values[0]
+    else:
+        raise ValueError(f"Style command not supported by the canvas tables: {name}")
+
+
+def _draw_cell_text(canv, text: str, style: CellStyle, x: float, y: float, width: float, height: float) -> None:
+    """Draw a single line of text in a cell, positioned as in a ReportLab Table."""
+    if style.valign == 'TOP':
+        text_y = y + height - style.topPadding - style.fontsize
+    elif style.valign == 'MIDDLE':
+        text_y = y + (style.bottomPadding + height - style.topPadding + style.leading) / 2.0 - style.fontsize
+    else:
+        text_y = y + style.bottomPadding + style.leading - style.fontsize
+
+    if style.alignment == 'RIGHT':
+        canv.drawRightString(x + width - style.rightPadding, text_y, text)
+    elif style.alignment in ('CENTRE', 'CENTER'):
+        canv.drawCentredString(x + (width + style.leftPadding - style.rightPadding) / 2.0, text_y, text)
+    else:
+        canv.drawString(x + style.leftPadding, text_y, text)
+
+
+class _TxLink(Flowable):
+    """
+    "URL" link to a tx, in a cell of a LongTable. Drawn at the same place as a Paragraph with a
+    <link> tag and the same style, without the Paragraph markup being parsed and laid out for
+    each row.
+    """
+
+    def __init__(self, url: str, style: ParagraphStyle):
+        super().__init__()
+        self.url = url
+        self.style = style
+
+    def wrap(self, availWidth, availHeight):
+        self.width, self.height = availWidth, self.style.leading
+        return self.width, self.height
+
+    def draw(self):
+        style = self.style
+        canv = self.canv
+        y = self.height - style.fontSize
+        canv.setFillColor(style.textColor)
+        canv.setFont(style.fontName, style.fontSize, style.leading)
+        canv.drawString(0, y, 'URL')
+        # The link rectangle of a Paragraph: the width of the text, the height of a line
+        link_y = y - style.fontSize / 8.0
+        canv.linkURL(self.url, (0, link_y, canv.stringWidth('URL', style.fontName, style.fontSize), link_y + style.leading), relative=1)
+
+
+def _make_section_table(
+        header: list,
+        rows: list,
+        col_widths: List[float],
+        style_commands: list,
+        link_column: Optional[int] = None,
+        link_style: Optional[ParagraphStyle] = None
+        ) -> _PagedTable:
+    """
+    Build the table of a report section: drawn directly on the canvas from CANVAS_TABLE_MIN_ROWS
+    rows, laid out as LongTables otherwise.
+
+    Args:
+        header: Header row
+        rows: Rows of the table (a total row included), the link column holding the URL of the tx link
+        col_widths: Width of each column
+        style_commands: TableStyle commands of the whole table (header at row 0)
+        link_column: Column holding the URL of the tx link of each row, if any
+        link_style: Style of the tx links of the LongTables
+
+    Returns:
+        The table flowable
+    """
+    if len(rows) >= CANVAS_TABLE_MIN_ROWS:
+        return _CanvasTable(header, rows, col_widths, style_commands, link_column=link_column)
+
+    if link_column is not None:
+        rows = [
+            row[:link_column] + [_TxLink(row[link_column], link_style)] + row[link_column + 1:]
+            if row[link_column] else row
+            for row in rows
+        ]
+    return _ChunkedTable(header, rows, col_widths, style_commands)
@@ -0,0 +1,22 @@
+from typing import Dict, NamedTuple
+
+PAYMENT_TOKEN = 'payment_token'
+REALTOKEN = 'realtoken'
+
+
+class TokenInfo(NamedTuple):
+    name: str
+    kind: str
+
+
+# The amounts and prices read by the API are already adjusted by the token decimals
+# (see the wallet trades ledger of the indexing module): the registry does not hold decimals.
+UNKNOWN_REALTOKEN = TokenInfo(name='Unknown realtoken', kind=REALTOKEN)
+
+
+def get_realtoken(token_registry: Dict[str, TokenInfo], address: str) -> TokenInfo:
+    """Return the registry entry of a realtoken, falling back to UNKNOWN_REALTOKEN for unknown realtokens."""
+    token = token_registry.get(address)
+    if token is not None and token.kind == REALTOKEN:
+        return token
+    return UNKNOWN_REALTOKEN
@@ -1,5 +1,7 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import List
+from pdf_generator_module.print_pdf.internals._report_rows import ReportRow
 
 def _get_report_parameter_section(start_date:str, end_date: str, user_addresses: List[str]):
 
@@ -16,38 +18,49 @@ def _get_report_parameter_section(start_date:str, end_date: str, user_addresses:
 def _format_number(value, threshold=0.01):
     return f"{value:.2f}" if value >= threshold else "< 0.01"
 
-def _format_timestamp(raw_timestamp):
-    return datetime.strptime(raw_timestamp[:-3], '%Y-%m-%d %H:%M').strftime('%d %b %Y %Hh%M').lstrip('0')
+def _format_timestamp(unix_timestamp):
+    # The date is formatted once per day (strftime is the slowest step of the formatting of a
+    # row), the time of the day is computed with integer arithmetic
+    day, seconds = divmod(int(unix_timestamp), 86400)
+    return f"{_format_day(day)} {seconds // 3600:02d}h{seconds % 3600 // 60:02d}"
 
-def _aggregate_total_row(sell_data_table, buy_data_table):
+@lru_cache(maxsize=4096)
+def _format_day(day):
+    return datetime.fromtimestamp(day * 86400, timezone.utc).strftime('%d %b %Y').lstrip('0')
 
-    total_buy = ["Total", "", "", 0.0, "", "", 0.0, ""]
-    total_sell = ["Total", "", "", 0.0, "", "", 0.0, ""]
+def _get_tx_url(transaction_hash):
+    return f'https://gnosisscan.io/tx/{transaction_hash}'
 
-    for row in sell_data_table:
-        try:
-            total_sell[3] += float(row[3])
-        except ValueError:
-            pass
-        try:
-            total_sell[6] += float(row[6])
-        except ValueError:
-            pass
-    
-    for row in buy_data_table:
-        try:
-            total_buy[3] += float(row[3])
-        except ValueError:
-            pass
-        try:
-            total_buy[6] += float(row[6])
-        except ValueError:
-            pass
-    
-    total_sell[3] = _format_number(total_sell[3])
-    total_sell[6] = _format_number(total_sell[6])
-    
-    total_buy[3] = _format_number(total_buy[3])
-    total_buy[6] = _format_number(total_buy[6])
-    
-    return total_sell, total_buy
\ No newline at end of file
+def _format_buy_sell_row(row: ReportRow, display_tx_hash: bool) -> List[str]:
+    """Format a buy or sell row (see _compute_report_rows) as the cells of its table. The tx column holds the URL of the link."""
+    cells = [
+        _format_timestamp(row.event_timestamp),
+        'Sell' if row.mode in [1, 4] else 'Buy',
+        row.token.name,
+        _format_number(row.amount),
+        _format_number(row.price),
+        row.counter_token.name,
+        _format_number(row.total),
+    ]
+    if display_tx_hash:
+        cells.append(_get_tx_url(row.transaction_hash))
+    return cells
+
+def _format_exchange_row(row: ReportRow, display_tx_hash: bool) -> List[str]:
+    """Format an exchange row (see _compute_report_rows) as the cells of its table. The tx column holds the URL of the link."""
+    cells = [
+        _format_timestamp(row.event_timestamp),
+        'Exchange',
+        _format_number(row.amount),
+        row.token.name,
+        _format_number(row.total),
+        row.counter_token.name,
+        _format_number(row.price),
+    ]
+    if display_tx_hash:
+        cells.append(_get_tx_url(row.transaction_hash))
+    return cells
+
+def _format_total_row(amount: float, total: float) -> List[str]:
+    """Format the total row of the buy or sell table (see _compute_report_totals)."""
+    return ["Total", "", "", _format_number(amount), "", "", _format_number(total), ""]
@@ -1,2 +1,4 @@
-from .get_accepted_offers_by_buyer_datetime import get_accepted_offers_by_buyer_datetime
-from .get_accepted_offers_by_seller_datetime import get_accepted_offers_by_seller_datetime
\ No newline at end of file
+from .connection_provider import ConnectionProvider
+from .get_accepted_offers_by_user_datetime import get_accepted_offers_by_user_datetime
+from .get_accepted_offers_totals_by_user_datetime import get_accepted_offers_totals_by_user_datetime
+from .get_address_activity import get_address_activity
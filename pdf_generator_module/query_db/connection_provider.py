@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Memory-mapped I/O size of the read connections (256 MB)
+MMAP_SIZE = 256 * 1024 * 1024
+# Page cache size of each read connection (negative value: size in KiB, i.e. 64 MB)
+CACHE_SIZE_KIB = -64 * 1024
+# Number of prepared statements cached by each connection (the report queries are constant strings)
+CACHED_STATEMENTS = 64
+# Maximum number of idle connections kept in the pool of a worker
+MAX_IDLE_CONNECTIONS = 4
+
+
+class ConnectionProvider:
+    """
+    Provide the read-only connections used by the report queries.
+
+    When the indexer publishes read-only snapshots of the database (see publish_snapshot in the
+    indexing module), the connections are opened on the newest snapshot as immutable: SQLite
+    then skips all file locking and change detection, so the queries do not depend on the
+    activity of the indexer. Without snapshot (not configured, or not published yet), the
+    connections are opened read-only on the database written by the indexer.
+
+    Connections are pooled per process (i.e. per gunicorn worker), so that a report request
+    reuses a connection whose schema is already parsed, whose page cache is warm and whose
+    report statements are already prepared. A pooled connection is reopened when the database
+    it was opened on is no longer the current one (a new snapshot has replaced it, or the
+    database file was replaced).
+    """
+
+    def __init__(self, db_path: str, snapshot_path: Optional[str] = None):
+        """
+        Args:
+            db_path: Path to the SQLite database written by the indexer
+            snapshot_path: Path of the read-only snapshot published by the indexer, if any
+        """
+        self.db_path = db_path
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        # Idle connections, with the identity of the database file they were opened on
+        self._idle: List[Tuple[sqlite3.Connection, tuple]] = []
+        self._stats = {'opened': 0, 'reused': 0, 'reopened': 0, 'in_use': 0}
+
+    def _get_source(self) -> Tuple[str, tuple]:
+        """Return the URI of the current database and its identity (path, and inode and mtime for a snapshot)."""
+        if self.snapshot_path:
+            try:
+                stat = os.stat(self.snapshot_path)
+            except FileNotFoundError:
+                pass
+            else:
+                uri = f"{Path(self.snapshot_path).resolve().as_uri()}?mode=ro&immutable=1"
+                return uri, (self.snapshot_path, stat.st_ino, stat.st_mtime_ns)
+        # Without immutable, SQLite checks the database file for changes at the start of each read
+        # transaction (rollback journal: the reads and the indexer commits wait on each other's locks),
+        # so a pooled connection reads the last committed data as long as the file is the same: the
+        # inode changes when the database is replaced (bulk load, bootstrap from an archive)
+        return f"{Path(self.db_path).resolve().as_uri()}?mode=ro", (self.db_path, os.stat(self.db_path).st_ino)
+
+    def _connect(self, uri: str) -> sqlite3.Connection:
+        # Connections are not shared between threads, but they can be released by another thread than the one that opened them
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = {CACHE_SIZE_KIB}")
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _acquire(self) -> Tuple[sqlite3.Connection, tuple]:
+        uri, source = self._get_source()
+        stale_connections = []
+        with self._lock:
+            # Connections inherited from the parent process (e.g. gunicorn --preload) must not be used
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._idle = []
+            conn = None
+            while self._idle:
+                idle_conn, idle_source = self._idle.pop()
+                if idle_source == source:
+                    conn = idle_conn
+                    self._stats['reused'] += 1
+                    break
+                stale_connections.append(idle_conn)
+                self._stats['reopened'] += 1
+            self._stats['in_use'] += 1
+
+        for stale_conn in stale_connections:
+            stale_conn.close()
+
+        if conn is None:
+            try:
+                conn = self._connect(uri)
+            except Exception:
+                with self._lock:
+                    self._stats['in_use'] -= 1
+                raise
+            with self._lock:
+                self._stats['opened'] += 1
+        return conn, source
+
+    def _release(self, conn: sqlite3.Connection, source: tuple) -> None:
+        with self._lock:
+            self._stats['in_use'] -= 1
+            if len(self._idle) < MAX_IDLE_CONNECTIONS and self._pid == os.getpid():
+                self._idle.append((conn, source))
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Context manager lending a pooled read-only connection to the newest available data."""
+        conn, source = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn, source)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Return the statistics of the pool of this process: number of connections opened, reused,
+        and reopened because the database was replaced (new snapshot), and number of connections in use and idle.
+        """
+        with self._lock:
+            return {'pid': os.getpid(), **self._stats, 'idle': len(self._idle)}
+
+    def close(self) -> None:
+        """Close the idle connections of the pool."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
@@ -0,0 +1,102 @@
+import json
+from typing import List, Dict, Any, Union
+from datetime import datetime
+from .connection_provider import ConnectionProvider
+from .internals._codecs import _get_address_ids, _decode_rows
+
+# The trades are read from the per-wallet ledger maintained by the indexer ('wallet_trades',
+# see init_db), with one range scan on (wallet_id, event_timestamp) per user address.
+# The ids of the user addresses are passed as a single JSON array parameter, so the query
+# text does not depend on the number of addresses.
+# A trade between two user addresses has one ledger row per address: the rows are grouped
+# by event, and the 'user_role' is 'both' when the user is on both sides.
+USER_TRADES_BY_DATETIME_QUERY = """
+WITH user_address_ids(address_id) AS (
+    SELECT value FROM json_each(:user_address_ids)
+)
+SELECT
+    event_id,
+    event_timestamp,
+    transaction_hash,
+    offer_type,
+    offer_token_id,
+    buyer_token_id,
+    amount,
+    price,
+    total,
+    CASE WHEN MIN(side) = MAX(side) THEN MIN(side) ELSE 'both' END AS user_role
+FROM wallet_trades
+WHERE wallet_id IN (SELECT address_id FROM user_address_ids)
+AND event_timestamp BETWEEN :from_datetime AND :to_datetime
+GROUP BY event_timestamp, event_id
+"""
+
+# The token ids are resolved into the binary addresses, converted into checksum strings
+# once the rows are fetched
+ACCEPTED_OFFERS_BY_USER_DATETIME_QUERY = f"""
+SELECT
+    trades.event_id,
+    trades.event_timestamp,
+    trades.transaction_hash,
+    trades.offer_type,
+    offer_token.address AS offer_token,
+    buyer_token.address AS buyer_token,
+    trades.amount,
+    trades.price,
+    trades.total,
+    trades.user_role
+FROM ({USER_TRADES_BY_DATETIME_QUERY}) AS trades
+CROSS JOIN addresses AS offer_token ON offer_token.address_id = trades.offer_token_id
+CROSS JOIN addresses AS buyer_token ON buyer_token.address_id = trades.buyer_token_id
+ORDER BY trades.event_timestamp ASC, trades.event_id ASC
+"""
+
+
+def get_accepted_offers_by_user_datetime(
+    connection_provider: ConnectionProvider, 
+    user_addresses: Union[str, List[str]], 
+    from_datetime: Union[int, datetime], 
+    to_datetime: Union[int, datetime]
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve accepted offers where the user addresses are either the buyer or the seller
+    within a datetime range.
+
+    The trades are read from the per-wallet ledger maintained by the indexer. An event matching
+    both sides (e.g. a trade between two wallets of the same user) is returned only once.
+
+    Args:
+        connection_provider (ConnectionProvider): Provider of the read-only database connections.
+        user_addresses (Union[str, List[str]]): Single user address or list of user addresses.
+        from_datetime (Union[int, datetime]): Starting datetime (Unix timestamp or timezone-aware datetime object), inclusive.
+        to_datetime (Union[int, datetime]): Ending datetime (Unix timestamp or timezone-aware datetime object), inclusive.
+
+    Returns:
+        List[Dict[str, Any]]: List of dictionaries with event data, ordered by timestamp.
+        The 'user_role' key is 'buyer', 'seller' or 'both' depending on which side(s)
+        of the trade belong to the user addresses. 'offer_type' is 'sell', 'purchase',
+        'payment_exchange' or 'realtoken_exchange', and 'amount', 'price' and 'total' are
+        adjusted by the token decimals. Addresses are checksum strings and transaction
+        hashes '0x' prefixed hexadecimal strings. 'event_timestamp' is a Unix timestamp.
+    """
+    with connection_provider.connection() as conn:
+        cursor = conn.cursor()
+        
+        # Convert single address to list if necessary
+        if isinstance(user_addresses, str):
+            user_addresses = [user_addresses]
+        
+        # Convert datetime objects to Unix timestamps if necessary
+        if isinstance(from_datetime, datetime):
+            from_datetime = int(from_datetime.timestamp())
+        if isinstance(to_datetime, datetime):
+            to_datetime = int(to_datetime.timestamp())
+        
+        parameters = {
+            'user_address_ids': json.dumps(_get_address_ids(cursor, user_addresses)),
+            'from_datetime': from_datetime,
+            'to_datetime': to_datetime
+        }
+        cursor.execute(ACCEPTED_OFFERS_BY_USER_DATETIME_QUERY, parameters)
+        
+        return _decode_rows(cursor)
@@ -0,0 +1,64 @@
+import json
+from typing import List, Dict, Any, Union
+from datetime import datetime
+from .get_accepted_offers_by_user_datetime import USER_TRADES_BY_DATETIME_QUERY
+from .connection_provider import ConnectionProvider
+from .internals._codecs import _get_address_ids, _decode_rows
+
+# Aggregates are computed inside SQLite from the decimals-adjusted values of the ledger.
+# They are grouped by everything the classification of a trade depends on.
+ACCEPTED_OFFERS_TOTALS_BY_USER_DATETIME_QUERY = f"""
+SELECT
+    offer_type,
+    user_role,
+    COUNT(*) AS events_count,
+    SUM(amount) AS amount_sum,
+    SUM(total) AS total_sum
+FROM ({USER_TRADES_BY_DATETIME_QUERY})
+GROUP BY offer_type, user_role
+"""
+
+
+def get_accepted_offers_totals_by_user_datetime(
+    connection_provider: ConnectionProvider, 
+    user_addresses: Union[str, List[str]], 
+    from_datetime: Union[int, datetime], 
+    to_datetime: Union[int, datetime]
+) -> List[Dict[str, Any]]:
+    """
+    Aggregate the accepted offers where the user addresses are either the buyer or the seller
+    within a datetime range.
+
+    The events aggregated are the same as the ones returned by get_accepted_offers_by_user_datetime.
+
+    Args:
+        connection_provider (ConnectionProvider): Provider of the read-only database connections.
+        user_addresses (Union[str, List[str]]): Single user address or list of user addresses.
+        from_datetime (Union[int, datetime]): Starting datetime (Unix timestamp or timezone-aware datetime object), inclusive.
+        to_datetime (Union[int, datetime]): Ending datetime (Unix timestamp or timezone-aware datetime object), inclusive.
+
+    Returns:
+        List[Dict[str, Any]]: One dictionary per (offer_type, user_role) with the number of events,
+        the sum of the amounts and the sum of the totals (adjusted by the token decimals).
+    """
+    with connection_provider.connection() as conn:
+        cursor = conn.cursor()
+        
+        # Convert single address to list if necessary
+        if isinstance(user_addresses, str):
+            user_addresses = [user_addresses]
+        
+        # Convert datetime objects to Unix timestamps if necessary
+        if isinstance(from_datetime, datetime):
+            from_datetime = int(from_datetime.timestamp())
+        if isinstance(to_datetime, datetime):
+            to_datetime = int(to_datetime.timestamp())
+        
+        parameters = {
+            'user_address_ids': json.dumps(_get_address_ids(cursor, user_addresses)),
+            'from_datetime': from_datetime,
+            'to_datetime': to_datetime
+        }
+        cursor.execute(ACCEPTED_OFFERS_TOTALS_BY_USER_DATETIME_QUERY, parameters)
+        
+        return _decode_rows(cursor)
@@ -0,0 +1,47 @@
+from typing import List, Dict, Any, Union
+from .connection_provider import ConnectionProvider
+from .internals._codecs import _decode_rows
+
+ADDRESS_ACTIVITY_QUERY = """
+SELECT
+    addresses.address,
+    address_activity.first_trade_timestamp,
+    address_activity.last_trade_timestamp,
+    address_activity.buyer_trades_count,
+    address_activity.seller_trades_count
+FROM addresses
+JOIN address_activity ON address_activity.address_id = addresses.address_id
+WHERE addresses.address IN ({placeholders})
+"""
+
+
+def get_address_activity(
+    connection_provider: ConnectionProvider,
+    user_addresses: Union[str, List[str]]
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve the activity summary (first and last trades, number of trades as buyer and as seller)
+    of user addresses. It is maintained by the indexer, so no event is read.
+
+    Args:
+        connection_provider (ConnectionProvider): Provider of the read-only database connections.
+        user_addresses (Union[str, List[str]]): Single user address or list of user addresses.
+
+    Returns:
+        List[Dict[str, Any]]: One dictionary per address with activity, with the checksum 'address',
+        'first_trade_timestamp' and 'last_trade_timestamp' (Unix timestamps), 'buyer_trades_count'
+        and 'seller_trades_count'. Addresses without any trade are not returned.
+    """
+    # Convert single address to list if necessary
+    if isinstance(user_addresses, str):
+        user_addresses = [user_addresses]
+    if not user_addresses:
+        return []
+
+    with connection_provider.connection() as conn:
+        cursor = conn.cursor()
+
+        address_blobs = [bytes.fromhex(address[2:]) for address in user_addresses]
+        cursor.execute(ADDRESS_ACTIVITY_QUERY.format(placeholders=', '.join('?' * len(address_blobs))), address_blobs)
+
+        return _decode_rows(cursor)
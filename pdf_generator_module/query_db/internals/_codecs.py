@@ -0,0 +1,51 @@
+import sqlite3
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List
+from eth_utils import to_checksum_address
+
+# Columns of the query results that hold a binary address or a binary transaction hash
+ADDRESS_COLUMNS = ('address', 'buyer_address', 'seller_address', 'offer_token', 'buyer_token')
+HASH_COLUMNS = ('transaction_hash',)
+
+
+@lru_cache(maxsize=65536)
+def _blob_to_address(address: bytes) -> str:
+    """Convert a 20-byte address into its checksum string. Cached since a report repeats the same few addresses."""
+    return to_checksum_address(address)
+
+
+def _blob_to_hash(value: bytes) -> str:
+    """Convert a 32-byte transaction hash into its '0x' prefixed hexadecimal string."""
+    return '0x' + value.hex()
+
+
+def _get_address_ids(cursor: sqlite3.Cursor, addresses: Iterable[str]) -> List[int]:
+    """
+    Resolve addresses into their ids of the 'addresses' table.
+    Addresses never seen by the indexer have no id and are left out.
+    """
+    address_blobs = [bytes.fromhex(address[2:]) for address in addresses]
+    if not address_blobs:
+        return []
+    placeholders = ', '.join('?' * len(address_blobs))
+    cursor.execute(f"SELECT address_id FROM addresses WHERE address IN ({placeholders})", address_blobs)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _decode_rows(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    """Fetch all the rows of the cursor as dictionaries, with binary addresses and hashes converted into strings."""
+    columns = [desc[0] for desc in cursor.description]
+    address_indexes = [i for i, column in enumerate(columns) if column in ADDRESS_COLUMNS]
+    hash_indexes = [i for i, column in enumerate(columns) if column in HASH_COLUMNS]
+
+    rows = []
+    for row in cursor.fetchall():
+        row = list(row)
+        for i in address_indexes:
+            if row[i] is not None:
+                row[i] = _blob_to_address(row[i])
+        for i in hash_indexes:
+            if row[i] is not None:
+                row[i] = _blob_to_hash(row[i])
+        rows.append(dict(zip(columns, row)))
+    return rows
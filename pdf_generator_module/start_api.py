@@ -15,7 +15,7 @@ def main():
         with open("config.json") as f:
             config = json.load(f)
         port = config.get("api_port", 5000)
-        workers = os.cpu_count() or 2  # Fallback to 2
+        workers = config.get("api_workers") or os.cpu_count() or 2  # Fallback to 2
 
         print(f"Starting server on port {port} with {workers} workers...")
         print("Press Ctrl+C to stop the server")
@@ -25,7 +25,7 @@ def main():
             "-w", str(workers),
             "-b", f"0.0.0.0:{port}",
             "pdf_generator_module.api.app:create_app()"
-        ], check=True)
+        ], check=True, env={**os.environ, "WEB_CONCURRENCY": str(workers)}) # read by the app to size the render pools
 
     except KeyboardInterrupt:
         print("\nServer stopped by user")
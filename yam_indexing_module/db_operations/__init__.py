@@ -1,2 +1,10 @@
 from .add_events_to_db import add_events_to_db
 from .init_db import init_db
+from .migrate_db import migrate_db
+from .rebuild_wallet_trades import rebuild_wallet_trades
+from .publish_snapshot import publish_snapshot
+from .bulk_load_db import bulk_load_db
+from .export_db_archive import export_db_archive
+from .bootstrap_db_from_archive import bootstrap_db_from_archive
+from .export_parquet import export_parquet
+from .maintenance_scheduler import MaintenanceScheduler, enable_incremental_vacuum
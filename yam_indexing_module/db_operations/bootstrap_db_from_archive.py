@@ -0,0 +1,72 @@
+import os
+import gzip
+import shutil
+import sqlite3
+import logging
+import time
+from .internal._db_archive import _file_sha256, _read_manifest, CHUNK_SIZE
+from .internal._migrations import SCHEMA_VERSION
+from .migrate_db import migrate_db
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+def bootstrap_db_from_archive(archive_path: str, db_path: str) -> int:
+    """
+    Create the database of a new node from an archive exported with export_db_archive.
+
+    The archive is checked against the SHA-256 of its manifest, decompressed next to the
+    database, checked with 'PRAGMA quick_check', migrated to the current schema and moved into
+    place atomically. Only the blocks after the last indexed block of the archive then need to
+    be backfilled, which the indexing service does at startup.
+
+    Args:
+        archive_path: Path of the archive (e.g. a file of a mounted volume)
+        db_path: Path of the SQLite database to create (it must not exist)
+
+    Returns:
+        int: The last indexed block of the archive
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError(f"Database {db_path} already exists")
+
+    start_time = time.time()
+    manifest = _read_manifest(archive_path)
+    if manifest['schema_version'] > SCHEMA_VERSION:
+        raise ValueError(f"Archive schema version {manifest['schema_version']} is newer than the supported version {SCHEMA_VERSION}")
+    if _file_sha256(archive_path) != manifest['sha256']:
+        raise ValueError(f"Checksum mismatch for the archive {archive_path}")
+
+    tmp_db_path = f"{db_path}.bootstrap.tmp"
+    try:
+        with gzip.open(archive_path, 'rb') as source, open(tmp_db_path, 'wb') as destination:
+            shutil.copyfileobj(source, destination, CHUNK_SIZE)
+
+        conn = sqlite3.connect(tmp_db_path)
+        try:
+            result = conn.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            conn.close()
+        if result != 'ok':
+            raise ValueError(f"Database of the archive {archive_path} is corrupted: {result}")
+
+        # Archives exported by an older version of the indexer are brought up to date
+        migrate_db(tmp_db_path)
+        os.replace(tmp_db_path, db_path)
+
+    finally:
+        if os.path.exists(tmp_db_path):
+            os.remove(tmp_db_path)
+
+    last_indexed_block = manifest['last_indexed_block']
+    logger.info(f"Database bootstrapped from {archive_path} up to block {last_indexed_block} in {time.time() - start_time:.1f}s")
+    print(f"Database bootstrapped from {archive_path} up to block {last_indexed_block}.")
+    return last_indexed_block
+
+if __name__ == "__main__":
+    import sys
+    import json
+    with open('config.json', 'r') as f:
+        DB_PATH = json.load(f)['db_path']
+    bootstrap_db_from_archive(sys.argv[1], DB_PATH)
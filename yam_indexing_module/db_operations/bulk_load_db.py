@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import logging
+import time
+from typing import List, Dict
+from .init_db import _create_tables, _create_indexes
+from .internal._event_handlers import _handle_offer_created, _handle_offer_accepted, _handle_offer_deleted, _handle_offer_updated
+from .internal._db_operations import _update_indexing_state
+from .internal._get_status_offer import _refresh_offer_statuses
+from .internal._wallet_trades import _rebuild_wallet_trades
+from .internal._address_activity import _rebuild_address_activity
+from .internal._migrations import _set_schema_version, SCHEMA_VERSION
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# The database being loaded is a temporary file that is discarded on failure:
+# it does not need a rollback journal nor to be synced to disk
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",  # 256 MB
+]
+
+PROGRESS_INTERVAL = 10000  # Number of events between two progress lines
+
+
+def bulk_load_db(
+    db_path: str,
+    event_batches: List[List[Dict]],
+    from_block: int,
+    to_block: int
+) -> None:
+    """
+    Create a new database from the whole history of YAM events, much faster than adding the
+    events one by one with add_events_to_db.
+
+    The events are loaded in a single transaction into a temporary database without secondary
+    indexes, with journaling and syncing disabled. The offer statuses, the wallet trades ledger
+    and the address activity are not maintained event by event but built once all the events
+    are loaded, after the indexes. The database is then analyzed and moved to db_path atomically,
+    so an interrupted load never leaves a partial database behind.
+
+    Args:
+        db_path: Path of the SQLite database to create (it must not exist)
+        event_batches: Lists of decoded events, loaded in order (offers must be created before their events)
+        from_block: First block covered by the events
+        to_block: Last block covered by the events
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError(f"Database {db_path} already exists, bulk load is only possible for a new database")
+
+    tmp_path = f"{db_path}.bulk.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    handlers = {
+        'OfferCreated': _handle_offer_created,
+        'OfferAccepted': lambda cursor, log: _handle_offer_accepted(cursor, log, bulk_load=True),
+        'OfferUpdated': _handle_offer_updated,
+        'OfferDeleted': _handle_offer_deleted,
+    }
+    n_events = sum(len(batch) for batch in event_batches)
+
+    conn = sqlite3.connect(tmp_path)
+    cursor = conn.cursor()
+    try:
+        for pragma in BULK_LOAD_PRAGMAS:
+            cursor.execute(pragma)
+        _create_tables(cursor)
+
+        # Load the events
+        start_time = time.time()
+        n_loaded = 0
+        for batch in event_batches:
+            for log in batch:
+                handler = handlers.get(log['topic'])
+                if handler is not None:
+                    handler(cursor, log)
+                n_loaded += 1
+                if n_loaded % PROGRESS_INTERVAL == 0 or n_loaded == n_events:
+                    print(f"\r{n_loaded} events loaded out of {n_events}", end="", flush=True)
+        conn.commit()
+        load_duration = time.time() - start_time
+        print()
+
+        # Build what is maintained event by event at ingest time
+        start_time = time.time()
+        print("Creating database indexes...")
+        _create_indexes(cursor)
+        print("Computing the offer statuses...")
+        _refresh_offer_statuses(cursor)
+        print("Building the wallet trades ledger...")
+        n_wallet_trades = _rebuild_wallet_trades(cursor)
+        _rebuild_address_activity(cursor)
+        _update_indexing_state(cursor, from_block, to_block)
+        _set_schema_version(cursor, SCHEMA_VERSION)
+        conn.commit()
+        cursor.execute("ANALYZE")
+        conn.commit()
+        build_duration = time.time() - start_time
+
+    except BaseException:
+        conn.close()
+        os.remove(tmp_path)
+        raise
+
+    conn.close()
+    os.replace(tmp_path, db_path)
+
+    throughput = n_loaded / load_duration if load_duration > 0 else float('inf')
+    summary = (
+        f"{n_loaded} events loaded in {load_duration:.1f}s ({throughput:.0f} events/s), "
+        f"indexes, statuses and ledger ({n_wallet_trades} rows) built in {build_duration:.1f}s"
+    )
+    logger.info(f"Bulk load of {db_path} completed - {summary}")
+    print(f"Bulk load completed: {summary}.")
@@ -0,0 +1,84 @@
+import os
+import gzip
+import shutil
+import sqlite3
+import logging
+import time
+from datetime import datetime, timezone
+from .internal._db_archive import _file_sha256, _write_manifest, CHUNK_SIZE
+from .internal._migrations import _get_schema_version
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+def export_db_archive(db_path: str, archive_path: str) -> dict:
+    """
+    Export a compressed and checksummed archive of the database, from which a new node can be
+    bootstrapped with bootstrap_db_from_archive instead of crawling the whole history.
+
+    The database is copied with 'VACUUM INTO' (a consistent and compacted copy, even while the
+    indexer is writing), compressed with gzip, and described by a manifest written next to the
+    archive with its SHA-256, the schema version and the last indexed block.
+
+    Args:
+        db_path: Path to the SQLite database file
+        archive_path: Path of the archive to write (e.g. 'YAM_events.db.gz')
+
+    Returns:
+        dict: The manifest of the archive
+    """
+    start_time = time.time()
+    tmp_db_path = f"{archive_path}.db.tmp"
+    tmp_archive_path = f"{archive_path}.tmp"
+    for path in (tmp_db_path, tmp_archive_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("VACUUM INTO ?", (tmp_db_path,))
+        finally:
+            conn.close()
+
+        # The high-water mark is read from the copy, so that it matches the archived data
+        conn = sqlite3.connect(tmp_db_path)
+        try:
+            cursor = conn.cursor()
+            schema_version = _get_schema_version(cursor)
+            cursor.execute("SELECT to_block FROM indexing_state ORDER BY indexing_id DESC LIMIT 1")
+            result = cursor.fetchone()
+            last_indexed_block = result[0] if result else None
+        finally:
+            conn.close()
+
+        with open(tmp_db_path, 'rb') as source, gzip.open(tmp_archive_path, 'wb') as destination:
+            shutil.copyfileobj(source, destination, CHUNK_SIZE)
+
+        manifest = {
+            'schema_version': schema_version,
+            'last_indexed_block': last_indexed_block,
+            'sha256': _file_sha256(tmp_archive_path),
+            'archive_size': os.path.getsize(tmp_archive_path),
+            'db_size': os.path.getsize(tmp_db_path),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+        }
+        os.replace(tmp_archive_path, archive_path)
+        _write_manifest(archive_path, manifest)
+
+    finally:
+        for path in (tmp_db_path, tmp_archive_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    logger.info(f"Database archive exported to {archive_path} - {manifest['archive_size'] / 1e6:.1f} MB, up to block {last_indexed_block}, in {time.time() - start_time:.1f}s")
+    print(f"Database archive exported to {archive_path} (up to block {last_indexed_block}).")
+    return manifest
+
+if __name__ == "__main__":
+    import sys
+    import json
+    with open('config.json', 'r') as f:
+        DB_PATH = json.load(f)['db_path']
+    export_db_archive(DB_PATH, sys.argv[1] if len(sys.argv) > 1 else f"{DB_PATH}.gz")
@@ -0,0 +1,290 @@
+"""
+Incremental columnar export of the event store, for analytics across all wallets.
+
+'offers' and 'offer_events' are written as Parquet files partitioned by month (Hive layout,
+e.g. 'offer_events/month=2024-06/part-000042.parquet', one file per export and month), readable
+as a single dataset by any Parquet engine (pyarrow, DuckDB, Polars...). Addresses and transaction
+hashes are lowercase '0x' prefixed strings, timestamps are UTC timestamps, uint256 values are kept
+as exact decimal strings with a float64 column next to them for vectorized aggregations.
+
+The rows are exported in insertion order, not in block order: the periodic TheGraph backfill
+inserts events of blocks that may have been exported already. Each run exports the events
+inserted since the previous one (event ids only grow) and the offers created since then, plus
+the offers missing at the previous run that have been backfilled since (offer ids are the
+on-chain ids, they can be inserted out of order). The high-water marks and the missing offer
+ids are recorded in '_export_state.json', with the number of rows exported so far, which each
+run checks against the tables. A run interrupted before updating the state is simply done
+again: it overwrites the files of the interrupted run.
+
+pyarrow is an optional dependency, only imported when an export is run.
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+STATE_FILE = '_export_state.json'
+FETCH_SIZE = 50000
+
+OFFERS_QUERY = """
+SELECT
+    offers.offer_id,
+    seller.address AS seller_address,
+    offer_token.address AS offer_token,
+    buyer_token.address AS buyer_token,
+    offers.initial_amount,
+    offers.initial_amount_num,
+    offers.price_per_unit,
+    offers.price_per_unit_num,
+    offers.block_number,
+    offers.log_index,
+    offers.transaction_hash,
+    offers.creation_timestamp
+FROM offers
+JOIN addresses AS seller ON seller.address_id = offers.seller_address_id
+JOIN addresses AS offer_token ON offer_token.address_id = offers.offer_token_id
+JOIN addresses AS buyer_token ON buyer_token.address_id = offers.buyer_token_id
+WHERE (offers.offer_id > :from_id AND offers.offer_id <= :to_id)
+    OR offers.offer_id IN (SELECT value FROM json_each(:backfilled_ids))
+"""
+
+OFFER_EVENTS_QUERY = """
+SELECT
+    offer_events.event_id,
+    offer_events.offer_id,
+    offer_events.event_type,
+    buyer.address AS buyer_address,
+    offer_events.amount,
+    offer_events.amount_num,
+    offer_events.price,
+    offer_events.price_num,
+    offer_events.amount_bought,
+    offer_events.amount_bought_num,
+    offer_events.price_bought,
+    offer_events.price_bought_num,
+    offer_events.block_number,
+    offer_events.log_index,
+    offer_events.transaction_hash,
+    offer_events.event_timestamp
+FROM offer_events
+LEFT JOIN addresses AS buyer ON buyer.address_id = offer_events.buyer_address_id
+WHERE offer_events.event_id > :from_id AND offer_events.event_id <= :to_id
+"""
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The Parquet export requires pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _get_schemas(pa) -> Dict[str, 'pyarrow.Schema']:
+    timestamp = pa.timestamp('s', tz='UTC')
+    return {
+        'offers': pa.schema([
+            ('offer_id', pa.int64()),
+            ('seller_address', pa.string()),
+            ('offer_token', pa.string()),
+            ('buyer_token', pa.string()),
+            ('initial_amount', pa.string()),
+            ('initial_amount_num', pa.float64()),
+            ('price_per_unit', pa.string()),
+            ('price_per_unit_num', pa.float64()),
+            ('block_number', pa.int64()),
+            ('log_index', pa.int32()),
+            ('transaction_hash', pa.string()),
+            ('creation_timestamp', timestamp),
+        ]),
+        'offer_events': pa.schema([
+            ('event_id', pa.int64()),
+            ('offer_id', pa.int64()),
+            ('event_type', pa.dictionary(pa.int8(), pa.string())),
+            ('buyer_address', pa.string()),
+            ('amount', pa.string()),
+            ('amount_num', pa.float64()),
+            ('price', pa.string()),
+            ('price_num', pa.float64()),
+            ('amount_bought', pa.string()),
+            ('amount_bought_num', pa.float64()),
+            ('price_bought', pa.string()),
+            ('price_bought_num', pa.float64()),
+            ('block_number', pa.int64()),
+            ('log_index', pa.int32()),
+            ('transaction_hash', pa.string()),
+            ('event_timestamp', timestamp),
+        ]),
+    }
+
+
+def _convert_value(value):
+    """Convert the BLOB addresses and hashes into '0x' prefixed strings."""
+    if isinstance(value, bytes):
+        return '0x' + value.hex()
+    return value
+
+
+def _export_table(
+    pa,
+    conn: sqlite3.Connection,
+    query: str,
+    params: dict,
+    timestamp_column: str,
+    schema,
+    table_dir: str,
+    file_name: str
+) -> int:
+    """Export the rows selected by a query, one file per month. Returns the number of rows."""
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    columns = [description[0] for description in cursor.description]
+    timestamp_index = columns.index(timestamp_column)
+
+    rows_by_month: Dict[str, List[tuple]] = {}
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        for row in rows:
+            timestamp = row[timestamp_index]
+            month = datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m') if timestamp is not None else 'unknown'
+            rows_by_month.setdefault(month, []).append(tuple(_convert_value(value) for value in row))
+
+    n_rows = 0
+    for month, rows in rows_by_month.items():
+        table = pa.table(
+            {column: [row[i] for row in rows] for i, column in enumerate(columns)},
+            schema=schema
+        )
+        partition_dir = os.path.join(table_dir, f"month={month}")
+        os.makedirs(partition_dir, exist_ok=True)
+        file_path = os.path.join(partition_dir, file_name)
+        pa.parquet.write_table(table, f"{file_path}.tmp", compression='zstd')
+        os.replace(f"{file_path}.tmp", file_path)
+        n_rows += len(rows)
+    return n_rows
+
+
+def _get_missing_offer_ids(cursor: sqlite3.Cursor, from_id: int, to_id: int) -> List[int]:
+    """Return the offer ids after from_id, up to to_id, that are not in the database (yet)."""
+    cursor.execute("SELECT offer_id FROM offers WHERE offer_id > ? AND offer_id <= ? ORDER BY offer_id", (from_id, to_id))
+    missing_offer_ids = []
+    expected_id = from_id + 1
+    for (offer_id,) in cursor:
+        missing_offer_ids.extend(range(expected_id, offer_id))
+        expected_id = offer_id + 1
+    missing_offer_ids.extend(range(expected_id, to_id + 1))
+    return missing_offer_ids
+
+
+def export_parquet(db_path: str, output_dir: str) -> Optional[Dict[str, int]]:
+    """
+    Export to Parquet the offers and offer events inserted since the previous export.
+
+    Args:
+        db_path: Path to the SQLite database file
+        output_dir: Root directory of the Parquet dataset
+
+    Returns:
+        Optional[Dict[str, int]]: Number of rows exported per table, or None if there was no new row
+    """
+    pa = _import_pyarrow()
+    start_time = time.time()
+
+    state_path = os.path.join(output_dir, STATE_FILE)
+    # Offer ids start at 0 on-chain
+    state = {
+        'exports': 0,
+        'last_offer_id': -1,
+        'missing_offer_ids': [],
+        'last_event_id': 0,
+        'exported_offers': 0,
+        'exported_offer_events': 0,
+    }
+    if os.path.exists(state_path):
+        with open(state_path, 'r') as f:
+            state = json.load(f)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        # A read transaction keeps both tables consistent while the indexer is writing
+        conn.execute("BEGIN")
+        cursor = conn.cursor()
+        cursor.execute("SELECT MAX(offer_id), COUNT(*) FROM offers")
+        last_offer_id, n_offers = cursor.fetchone()
+        cursor.execute("SELECT MAX(event_id), COUNT(*) FROM offer_events")
+        last_event_id, n_offer_events = cursor.fetchone()
+        last_offer_id = max(state['last_offer_id'], last_offer_id if last_offer_id is not None else -1)
+        last_event_id = max(state['last_event_id'], last_event_id or 0)
+
+        cursor.execute(
+            "SELECT offer_id FROM offers WHERE offer_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(state['missing_offer_ids']),)
+        )
+        backfilled_offer_ids = [offer_id for (offer_id,) in cursor.fetchall()]
+
+        if last_offer_id == state['last_offer_id'] and last_event_id == state['last_event_id'] and not backfilled_offer_ids:
+            return None
+
+        file_name = f"part-{state['exports'] + 1:06d}.parquet"
+        schemas = _get_schemas(pa)
+        exported = {
+            'offers': _export_table(
+                pa, conn, OFFERS_QUERY,
+                {'from_id': state['last_offer_id'], 'to_id': last_offer_id, 'backfilled_ids': json.dumps(backfilled_offer_ids)},
+                'creation_timestamp', schemas['offers'], os.path.join(output_dir, 'offers'), file_name
+            ),
+            'offer_events': _export_table(
+                pa, conn, OFFER_EVENTS_QUERY,
+                {'from_id': state['last_event_id'], 'to_id': last_event_id},
+                'event_timestamp', schemas['offer_events'], os.path.join(output_dir, 'offer_events'), file_name
+            ),
+        }
+
+        missing_offer_ids = sorted(set(state['missing_offer_ids']) - set(backfilled_offer_ids))
+        missing_offer_ids += _get_missing_offer_ids(cursor, state['last_offer_id'], last_offer_id)
+        conn.rollback()
+
+    finally:
+        conn.close()
+
+    state = {
+        'exports': state['exports'] + 1,
+        'last_offer_id': last_offer_id,
+        'missing_offer_ids': missing_offer_ids,
+        'last_event_id': last_event_id,
+        'exported_offers': state['exported_offers'] + exported['offers'],
+        'exported_offer_events': state['exported_offer_events'] + exported['offer_events'],
+    }
+    with open(f"{state_path}.tmp", 'w') as f:
+        json.dump(state, f)
+    os.replace(f"{state_path}.tmp", state_path)
+
+    # Every row of the tables must have been exported once, whenever it was inserted
+    if state['exported_offers'] != n_offers or state['exported_offer_events'] != n_offer_events:
+        logger.error(
+            f"Parquet export out of sync with the database: {state['exported_offers']}/{n_offers} offers and "
+            f"{state['exported_offer_events']}/{n_offer_events} events exported. Export again to a new directory."
+        )
+
+    logger.info(
+        f"Parquet export n°{state['exports']} to {output_dir} - {exported['offers']} offers "
+        f"({len(backfilled_offer_ids)} backfilled), {exported['offer_events']} events in {time.time() - start_time:.1f}s"
+    )
+    return exported
+
+if __name__ == "__main__":
+    import sys
+    with open('config.json', 'r') as f:
+        DB_PATH = json.load(f)['db_path']
+    result = export_parquet(DB_PATH, sys.argv[1] if len(sys.argv) > 1 else 'parquet_export')
+    print(f"Exported rows: {result}" if result else "No new row to export.")
@@ -1,44 +1,103 @@
 import sqlite3
+from .internal._migrations import _set_schema_version, SCHEMA_VERSION
+from .migrate_db import migrate_db
 
-def init_db(DB_PATH):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def _create_tables(cursor: sqlite3.Cursor) -> None:
+    """Create the tables of the current schema, without their secondary indexes."""
+    # Free pages are released by the maintenance of the indexing service (see MaintenanceScheduler).
+    # The mode must be set before the first table is created.
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
 
-    # Create tables
-    print("Creating database tables...")
+    # uint256 values are stored as TEXT to keep the exact on-chain value. Each of them has a
+    # '_num' REAL shadow column (same raw unit, not adjusted by the token decimals) so that
+    # SQLite can sum and compare them natively.
+    # Addresses are stored once, as 20-byte BLOBs, in the 'addresses' table and referenced by
+    # their integer id. Transaction hashes are stored as 32-byte BLOBs.
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS addresses (
+        address_id INTEGER PRIMARY KEY,
+        address BLOB NOT NULL UNIQUE
+    );
+    """)
 
-    # Create tables
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS offers (
         offer_id INTEGER PRIMARY KEY,
-        seller_address TEXT NOT NULL,
+        seller_address_id INTEGER NOT NULL,
         initial_amount TEXT NOT NULL,
         price_per_unit TEXT NOT NULL,
-        offer_token TEXT NOT NULL,
-        buyer_token TEXT NOT NULL,
+        offer_token_id INTEGER NOT NULL,
+        buyer_token_id INTEGER NOT NULL,
         status TEXT CHECK (status IN ('InProgress', 'SoldOut', 'Deleted') ) DEFAULT 'InProgress',
         block_number INTEGER NOT NULL,
-        transaction_hash TEXT NOT NULL,
+        transaction_hash BLOB NOT NULL,
         log_index INTEGER NOT NULL,
-        creation_timestamp DATETIME
+        creation_timestamp INTEGER,
+        initial_amount_num REAL NOT NULL,
+        price_per_unit_num REAL NOT NULL,
+        FOREIGN KEY (seller_address_id) REFERENCES addresses (address_id),
+        FOREIGN KEY (offer_token_id) REFERENCES addresses (address_id),
+        FOREIGN KEY (buyer_token_id) REFERENCES addresses (address_id)
     );
     """)
 
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS offer_events (
+        event_id INTEGER PRIMARY KEY,
         offer_id INTEGER NOT NULL,
         event_type TEXT NOT NULL CHECK (event_type IN ('OfferCreated', 'OfferUpdated', 'OfferAccepted', 'OfferDeleted')),
         amount TEXT,
         price TEXT,
-        buyer_address TEXT,
+        buyer_address_id INTEGER,
         amount_bought TEXT,
         block_number INTEGER NOT NULL,
-        transaction_hash TEXT NOT NULL,
+        transaction_hash BLOB NOT NULL,
         log_index INTEGER NOT NULL,
         price_bought TEXT,
-        event_timestamp DATETIME,
-        unique_id TEXT PRIMARY KEY NOT NULL,
-        FOREIGN KEY (offer_id) REFERENCES offers (offer_id)
+        event_timestamp INTEGER,
+        amount_num REAL,
+        price_num REAL,
+        amount_bought_num REAL,
+        price_bought_num REAL,
+        UNIQUE (transaction_hash, log_index),
+        FOREIGN KEY (offer_id) REFERENCES offers (offer_id),
+        FOREIGN KEY (buyer_address_id) REFERENCES addresses (address_id)
+    );
+    """)
+
+    # Per-wallet trade ledger, maintained at ingest time: one row per (wallet, accepted event)
+    # with the values adjusted by the token decimals (see internal/_wallet_trades.py).
+    # The primary key makes a report a single range scan on (wallet, timestamp).
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS wallet_trades (
+        wallet_id INTEGER NOT NULL,
+        event_timestamp INTEGER NOT NULL,
+        event_id INTEGER NOT NULL,
+        side TEXT NOT NULL CHECK (side IN ('buyer', 'seller', 'both')),
+        offer_type TEXT NOT NULL CHECK (offer_type IN ('sell', 'purchase', 'payment_exchange', 'realtoken_exchange')),
+        offer_token_id INTEGER NOT NULL,
+        buyer_token_id INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        price REAL NOT NULL,
+        total REAL NOT NULL,
+        transaction_hash BLOB NOT NULL,
+        PRIMARY KEY (wallet_id, event_timestamp, event_id),
+        FOREIGN KEY (wallet_id) REFERENCES addresses (address_id),
+        FOREIGN KEY (event_id) REFERENCES offer_events (event_id)
+    ) WITHOUT ROWID;
+    """)
+
+    # Activity summary of every address that took part in an accepted offer, maintained
+    # with the ledger (see internal/_address_activity.py)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS address_activity (
+        address_id INTEGER PRIMARY KEY,
+        first_trade_timestamp INTEGER NOT NULL,
+        last_trade_timestamp INTEGER NOT NULL,
+        buyer_trades_count INTEGER NOT NULL DEFAULT 0,
+        seller_trades_count INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (address_id) REFERENCES addresses (address_id)
     );
     """)
 
@@ -50,32 +109,37 @@ def init_db(DB_PATH):
     );
     """)
 
-    # Create indexes for query optimization
-    print("Creating database indexes...")
-    
-    # Composite index for offer_events filtering (most important)
-    cursor.execute("""
-    CREATE INDEX IF NOT EXISTS idx_offer_events_type_timestamp 
-    ON offer_events (event_type, event_timestamp);
-    """)
 
-    # Index for buyer address filtering
+def _create_indexes(cursor: sqlite3.Cursor) -> None:
+    """Create the secondary indexes of the current schema."""
+    # Index for the offer status computation (events of an offer in blockchain order)
     cursor.execute("""
-    CREATE INDEX IF NOT EXISTS idx_offer_events_buyer_address 
-    ON offer_events (buyer_address);
+    CREATE INDEX IF NOT EXISTS idx_offer_events_offer_id_block 
+    ON offer_events (offer_id, block_number, log_index);
     """)
 
-    # Index for seller address filtering  
-    cursor.execute("""
-    CREATE INDEX IF NOT EXISTS idx_offers_seller_address 
-    ON offers (seller_address);
-    """)
 
-    # Foreign key index for JOIN optimization
-    cursor.execute("""
-    CREATE INDEX IF NOT EXISTS idx_offer_events_offer_id 
-    ON offer_events (offer_id);
-    """)
+def init_db(DB_PATH):
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    # An existing database is brought up to date by its migrations instead
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'offers'")
+    if cursor.fetchone() is not None:
+        conn.close()
+        print("Database already exists.")
+        migrate_db(DB_PATH)
+        return
+
+    # Create tables
+    print("Creating database tables...")
+    _create_tables(cursor)
+
+    # Create indexes for query optimization
+    print("Creating database indexes...")
+    _create_indexes(cursor)
+
+    _set_schema_version(cursor, SCHEMA_VERSION)
 
     conn.commit()
     conn.close()
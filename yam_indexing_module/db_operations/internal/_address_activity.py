@@ -0,0 +1,63 @@
+"""
+Address activity summary.
+
+The 'address_activity' table holds, for every address that took part in an accepted offer,
+the timestamps of its first and last trades and its number of trades as buyer and as seller.
+It is derived from the wallet_trades ledger and maintained with it, so that the API can answer
+requests for wallets without activity, and clamp date ranges, without reading the events.
+"""
+
+import sqlite3
+from typing import List
+
+UPSERT_ADDRESS_ACTIVITY_QUERY = """
+INSERT INTO address_activity (
+    address_id, first_trade_timestamp, last_trade_timestamp, buyer_trades_count, seller_trades_count
+) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (address_id) DO UPDATE SET
+    first_trade_timestamp = MIN(first_trade_timestamp, excluded.first_trade_timestamp),
+    last_trade_timestamp = MAX(last_trade_timestamp, excluded.last_trade_timestamp),
+    buyer_trades_count = buyer_trades_count + excluded.buyer_trades_count,
+    seller_trades_count = seller_trades_count + excluded.seller_trades_count
+"""
+
+
+def _update_address_activity(cursor: sqlite3.Cursor, wallet_trade_rows: List[tuple]) -> None:
+    """
+    Add the trades of an accepted event to the activity of its addresses.
+
+    Args:
+        cursor: Database cursor
+        wallet_trade_rows: wallet_trades rows of the event (see _get_wallet_trade_rows)
+    """
+    cursor.executemany(UPSERT_ADDRESS_ACTIVITY_QUERY, [
+        (wallet_id, event_timestamp, event_timestamp, int(side in ('buyer', 'both')), int(side in ('seller', 'both')))
+        for wallet_id, event_timestamp, _, side, *_ in wallet_trade_rows
+    ])
+
+
+def _rebuild_address_activity(cursor: sqlite3.Cursor) -> int:
+    """
+    Rebuild the whole address activity table from the wallet_trades ledger.
+
+    Args:
+        cursor: Database cursor
+
+    Returns:
+        int: Number of addresses with activity
+    """
+    cursor.execute("DELETE FROM address_activity")
+    cursor.execute("""
+    INSERT INTO address_activity (
+        address_id, first_trade_timestamp, last_trade_timestamp, buyer_trades_count, seller_trades_count
+    )
+    SELECT
+        wallet_id,
+        MIN(event_timestamp),
+        MAX(event_timestamp),
+        SUM(side IN ('buyer', 'both')),
+        SUM(side IN ('seller', 'both'))
+    FROM wallet_trades
+    GROUP BY wallet_id
+    """)
+    return cursor.rowcount
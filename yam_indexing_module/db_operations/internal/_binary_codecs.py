@@ -0,0 +1,39 @@
+"""
+Binary encoding of addresses and transaction hashes.
+
+Addresses are stored once in the 'addresses' table as 20-byte BLOBs and referenced by their
+integer id. Transaction hashes are stored as 32-byte BLOBs. Decoding the bytes of an address
+gives it back in lowercase: the checksum casing is applied when the value is read.
+"""
+
+import sqlite3
+
+
+def _hex_to_bytes(value: str) -> bytes:
+    """Convert a '0x' prefixed hexadecimal string (address or hash) into its raw bytes."""
+    return bytes.fromhex(value[2:] if value[:2] in ('0x', '0X') else value)
+
+
+def _bytes_to_hex(value: bytes) -> str:
+    """Convert raw bytes into a lowercase '0x' prefixed hexadecimal string."""
+    return '0x' + value.hex()
+
+
+def _get_address_id(cursor: sqlite3.Cursor, address: str) -> int:
+    """
+    Return the id of an address in the 'addresses' table, registering it if it is not known yet.
+
+    Args:
+        cursor: Database cursor
+        address: '0x' prefixed address, in any casing
+
+    Returns:
+        int: address_id of the address
+    """
+    address_bytes = _hex_to_bytes(address)
+    cursor.execute("SELECT address_id FROM addresses WHERE address = ?", (address_bytes,))
+    row = cursor.fetchone()
+    if row is not None:
+        return row[0]
+    cursor.execute("INSERT INTO addresses (address) VALUES (?)", (address_bytes,))
+    return cursor.lastrowid
@@ -0,0 +1,35 @@
+"""
+Database archives: a gzip-compressed copy of the database, with a JSON manifest next to it
+('<archive>.json') holding the SHA-256 of the archive, the schema version and the last indexed
+block of the database (its high-water mark).
+"""
+
+import hashlib
+import json
+from typing import Dict
+
+MANIFEST_SUFFIX = '.json'
+CHUNK_SIZE = 1024 * 1024
+
+
+def _get_manifest_path(archive_path: str) -> str:
+    return archive_path + MANIFEST_SUFFIX
+
+
+def _file_sha256(path: str) -> str:
+    """Return the hexadecimal SHA-256 of a file, read by chunks."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _write_manifest(archive_path: str, manifest: Dict) -> None:
+    with open(_get_manifest_path(archive_path), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def _read_manifest(archive_path: str) -> Dict:
+    with open(_get_manifest_path(archive_path), 'r') as f:
+        return json.load(f)
@@ -1,10 +1,11 @@
 import sqlite3
 from typing import Dict
-from datetime import datetime
-from web3 import Web3
+import time
 from ._get_status_offer import _get_offer_status
+from ._binary_codecs import _get_address_id, _hex_to_bytes
+from ._wallet_trades import _add_wallet_trades
 
-def _get_timestamp_value(log: Dict) -> str:
+def _get_timestamp_value(log: Dict) -> int:
     """
     Get timestamp value from log, either from Unix timestamp or current time.
     
@@ -12,14 +13,13 @@ def _get_timestamp_value(log: Dict) -> str:
         log: Event log data
         
     Returns:
-        Timestamp string in SQLite datetime format
+        Unix timestamp in seconds (UTC)
     """
     if 'timestamp' in log and log['timestamp'] is not None:
-        # Convert Unix timestamp to datetime string
-        return datetime.fromtimestamp(int(log['timestamp'])).strftime('%Y-%m-%d %H:%M:%S')
+        return int(log['timestamp'])
     else:
         # Use current timestamp
-        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return int(time.time())
 
 def _handle_offer_created(
     cursor: sqlite3.Cursor,
@@ -38,10 +38,10 @@ def _handle_offer_created(
     # Build the SQL query
     insert_query = """
         INSERT INTO offers (
-            offer_id, seller_address, initial_amount, price_per_unit,
-            offer_token, buyer_token, transaction_hash, block_number, log_index,
-            creation_timestamp
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            offer_id, seller_address_id, initial_amount, price_per_unit,
+            offer_token_id, buyer_token_id, transaction_hash, block_number, log_index,
+            creation_timestamp, initial_amount_num, price_per_unit_num
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """
 
     try:
@@ -50,15 +50,17 @@ def _handle_offer_created(
             insert_query,
             (
                 log['offerId'],
-                Web3.to_checksum_address(log['seller']),
+                _get_address_id(cursor, log['seller']),
                 str(log['amount']),
                 str(log['price']),
-                Web3.to_checksum_address(log['offerToken']),
-                Web3.to_checksum_address(log['buyerToken']),
-                log['transactionHash'],
+                _get_address_id(cursor, log['offerToken']),
+                _get_address_id(cursor, log['buyerToken']),
+                _hex_to_bytes(log['transactionHash']),
                 log['blockNumber'],
                 log['logIndex'],
-                timestamp_value
+                timestamp_value,
+                float(log['amount']),
+                float(log['price'])
             )
         )
     except sqlite3.IntegrityError as e:
@@ -69,28 +71,29 @@ def _handle_offer_created(
 
 def _handle_offer_accepted(
     cursor: sqlite3.Cursor,
-    log: Dict
+    log: Dict,
+    bulk_load: bool = False
 ) -> None:
     """
-    Handle 'OfferAccepted' event by recording acceptance and updating offer status.
+    Handle 'OfferAccepted' event by recording acceptance, adding it to the wallet trades ledger
+    and updating offer status.
     
     Args:
         cursor: Database cursor
         log: Event log data
+        bulk_load: Only record the acceptance. The ledger and the offer statuses are then built
+            once all the events are loaded (see bulk_load_db).
     """
-    # Create a unique ID for the primary key of the table offer_events
-    unique_id = f"{log['transactionHash']}_{log['logIndex']}"
-    
     # Get timestamp value
     timestamp_value = _get_timestamp_value(log)
 
     # Build the SQL query
     insert_query = """
         INSERT INTO offer_events (
-            offer_id, event_type, buyer_address, amount_bought, price_bought,
-            transaction_hash, block_number, log_index, unique_id,
-            event_timestamp
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            offer_id, event_type, buyer_address_id, amount_bought, price_bought,
+            transaction_hash, block_number, log_index,
+            event_timestamp, amount_bought_num, price_bought_num
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """
     
     try:
@@ -99,20 +102,27 @@ def _handle_offer_accepted(
             (
                 log['offerId'],
                 log['topic'],
-                Web3.to_checksum_address(log['buyer']),
+                _get_address_id(cursor, log['buyer']),
                 str(log['amount']),
                 str(log['price']),
-                log['transactionHash'],
+                _hex_to_bytes(log['transactionHash']),
                 log['blockNumber'],
                 log['logIndex'],
-                unique_id,
-                timestamp_value
+                timestamp_value,
+                float(log['amount']),
+                float(log['price'])
             )
         )
+        # Record the trade in the ledger of the buyer and of the seller
+        if not bulk_load:
+            _add_wallet_trades(cursor, cursor.lastrowid)
     except sqlite3.IntegrityError as e:
         # Ignore duplicate entries -> silently skip already-added entries
-        if 'UNIQUE constraint failed: offer_events.unique_id' not in str(e):
+        if 'UNIQUE constraint failed: offer_events.transaction_hash, offer_events.log_index' not in str(e):
             raise e
+
+    if bulk_load:
+        return
     
     # Get current offer status and update if necessary
     status = _get_offer_status(cursor, log['offerId'])
@@ -134,9 +144,6 @@ def _handle_offer_updated(
         cursor: Database cursor
         log: Event log data
     """
-    # Create a unique ID for the primary key of the table offer_events
-    unique_id = f"{log['transactionHash']}_{log['logIndex']}"
-    
     # Get timestamp value
     timestamp_value = _get_timestamp_value(log)
 
@@ -144,9 +151,9 @@ def _handle_offer_updated(
     insert_query = """
         INSERT INTO offer_events (
             offer_id, event_type, amount, price,
-            transaction_hash, block_number, log_index, unique_id,
-            event_timestamp
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            transaction_hash, block_number, log_index,
+            event_timestamp, amount_num, price_num
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """
 
     try:
@@ -157,16 +164,17 @@ def _handle_offer_updated(
                 log['topic'],
                 str(log['newAmount']),
                 str(log['newPrice']),
-                log['transactionHash'],
+                _hex_to_bytes(log['transactionHash']),
                 log['blockNumber'],
                 log['logIndex'],
-                unique_id,
-                timestamp_value
+                timestamp_value,
+                float(log['newAmount']),
+                float(log['newPrice'])
             )
         )
     except sqlite3.IntegrityError as e:
         # Ignore duplicate entries -> silently skip already-added entries
-        if 'UNIQUE constraint failed: offer_events.unique_id' not in str(e):
+        if 'UNIQUE constraint failed: offer_events.transaction_hash, offer_events.log_index' not in str(e):
             raise e
     
     # Update offer status to 'InProgress'
@@ -187,18 +195,15 @@ def _handle_offer_deleted(
         cursor: Database cursor
         log: Event log data
     """
-    # Create a unique ID for the primary key of the table offer_events
-    unique_id = f"{log['transactionHash']}_{log['logIndex']}"
-    
     # Get timestamp value
     timestamp_value = _get_timestamp_value(log)
 
     # Build the SQL query
     insert_query = """
         INSERT INTO offer_events (
-            offer_id, event_type, transaction_hash, block_number, log_index, unique_id,
+            offer_id, event_type, transaction_hash, block_number, log_index,
             event_timestamp
-        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        ) VALUES (?, ?, ?, ?, ?, ?)
     """
 
     try:
@@ -207,16 +212,15 @@ def _handle_offer_deleted(
             (
                 log['offerId'],
                 log['topic'],
-                log['transactionHash'],
+                _hex_to_bytes(log['transactionHash']),
                 log['blockNumber'],
                 log['logIndex'],
-                unique_id,
                 timestamp_value
             )
         )
     except sqlite3.IntegrityError as e:
         # Ignore duplicate entries -> silently skip already-added entries
-        if 'UNIQUE constraint failed: offer_events.unique_id' not in str(e):
+        if 'UNIQUE constraint failed: offer_events.transaction_hash, offer_events.log_index' not in str(e):
             raise e
     
     # Update offer status to 'Deleted'
@@ -1,61 +1,85 @@
-from typing import List, Dict, Optional, Any
+from typing import Optional
 import sqlite3
 
+# Relative margin under which the REAL remaining amount is considered too close to zero
+# to decide the status, and the exact uint256 TEXT values are used instead
+REMAINING_AMOUNT_RELATIVE_MARGIN = 1e-9
+
 def _get_offer_status(cursor: sqlite3.Cursor, offer_id: str) -> Optional[str]:
     """
     Calculate the current status of an offer based on its event history.
-    
+
     Determines offer status using the following logic:
     - If the last event is 'OfferDeleted', status is 'Deleted'
     - Otherwise, calculate remaining amount starting from the latest 'OfferUpdated' event (or from the original offer if no updates)
     - If remaining amount is 0, status is 'SoldOut'
     - If remaining amount is > 0, status is 'InProgress'
-    
+
+    The remaining amount is computed inside SQLite with the REAL shadow columns. When it is
+    too close to zero for the REAL precision, it is computed again with the exact uint256 values.
+
     Args:
         cursor: Database cursor
         offer_id: ID of the offer to check
-        
+
     Returns:
         Current status ('Deleted', 'SoldOut', 'InProgress') or None if status cannot be determined
     """
-    # Get all events for this offer
-    events = _get_all_events_from_offer_id(cursor, offer_id)
-    
+    # Get the original offer
+    cursor.execute(
+        "SELECT initial_amount, initial_amount_num, block_number, log_index FROM offers WHERE offer_id = ?",
+        (offer_id,)
+    )
+    offer = cursor.fetchone()
+    if offer is None:
+        return None
+
     # Check if offer was deleted (last event is OfferDeleted)
-    if len(events) > 0 and events[-1].get('event_type') == 'OfferDeleted':
+    cursor.execute(
+        "SELECT event_type FROM offer_events WHERE offer_id = ? ORDER BY block_number DESC, log_index DESC LIMIT 1",
+        (offer_id,)
+    )
+    last_event = cursor.fetchone()
+    if last_event is not None and last_event[0] == 'OfferDeleted':
         return 'Deleted'
-    
-    # Find the most recent 'OfferUpdated' event
-    last_offer_updated_index = None
-    
-    for i, event in enumerate(events):
-        if event.get('event_type') == 'OfferUpdated':
-            # Keep track of the index of the last 'OfferUpdated' event
-            last_offer_updated_index = i
-    
-    # If an 'OfferUpdated' event was found, consider only events after that one
-    if last_offer_updated_index is not None:
-        events = events[last_offer_updated_index:]
-    
-    # Calculate remaining amount
-    if len(events) > 0:
-        # Get initial amount from first event (either original or after last update)
-        initial_amount = events[0].get('initial_amount', events[0].get('amount'))
-        
-        # Ensure we have a valid amount to start with
-        if initial_amount is None:
-            return None
-            
-        amount = int(initial_amount)
-        
-        # Subtract all bought amounts from subsequent acceptance events
-        for event in events[1:]:
-            amount_bought = event.get('amount_bought')
-            if amount_bought is not None:
-                amount -= int(amount_bought)
-    else:
+
+    # Get initial amount from the most recent 'OfferUpdated' event, or from the original offer if no updates
+    cursor.execute(
+        """
+        SELECT amount, amount_num, block_number, log_index FROM offer_events
+        WHERE offer_id = ? AND event_type = 'OfferUpdated'
+        ORDER BY block_number DESC, log_index DESC LIMIT 1
+        """,
+        (offer_id,)
+    )
+    last_update = cursor.fetchone()
+    initial_amount, initial_amount_num, from_block_number, from_log_index = last_update if last_update is not None else offer
+
+    # Ensure we have a valid amount to start with
+    if initial_amount is None:
         return None
-    
+
+    # Subtract all bought amounts from subsequent acceptance events
+    accepted_events_filter = """
+        FROM offer_events
+        WHERE offer_id = ? AND event_type = 'OfferAccepted'
+        AND (block_number, log_index) > (?, ?)
+    """
+    parameters = (offer_id, from_block_number, from_log_index)
+
+    cursor.execute(f"SELECT ? - COALESCE(SUM(amount_bought_num), 0) {accepted_events_filter}", (initial_amount_num,) + parameters)
+    remaining_amount_num = cursor.fetchone()[0]
+
+    if remaining_amount_num > initial_amount_num * REMAINING_AMOUNT_RELATIVE_MARGIN:
+        return 'InProgress'
+    elif remaining_amount_num < -initial_amount_num * REMAINING_AMOUNT_RELATIVE_MARGIN:
+        # Negative amount is an error condition
+        return None
+
+    # Remaining amount is close to 0: compute it exactly
+    cursor.execute(f"SELECT amount_bought {accepted_events_filter}", parameters)
+    amount = int(initial_amount) - sum(int(row[0]) for row in cursor.fetchall())
+
     # Determine status based on remaining amount
     if amount == 0:
         return 'SoldOut'
@@ -64,49 +88,30 @@ def _get_offer_status(cursor: sqlite3.Cursor, offer_id: str) -> Optional[str]:
     else:
         # Negative amount is an error condition
         return None
-    
 
-def _get_all_events_from_offer_id(cursor: sqlite3.Cursor, offer_id: str) -> List[Dict[str, Any]]:
+
+def _refresh_offer_statuses(cursor: sqlite3.Cursor) -> int:
     """
-    Retrieve all events related to a specific offer.
-    
-    Fetches the original offer and all events from the database, combines them
-    into a single list, and sorts them by block number and log index to maintain
-    chronological order.
-    
+    Set the status of every offer with events from its event history, as done event by event
+    at ingest time. Offers whose status cannot be determined keep their current status.
+
     Args:
         cursor: Database cursor
-        offer_id: ID of the offer to fetch events for
-        
+
     Returns:
-        List of dictionaries containing event data, sorted by block order
+        int: Number of offers whose status was changed
     """
-    result = []
-    
-    # Query to get the offer from the offers table
-    cursor.execute("SELECT * FROM offers WHERE offer_id = ?", (offer_id,))
-    offer = cursor.fetchone()
-    
-    # If the offer exists, add it to the result list
-    if offer:
-        # Convert the tuple to a dictionary using column names
-        offer_dict = dict(zip([column[0] for column in cursor.description], offer))
-        result.append(offer_dict)
-        
-        # Query to get all events related to this offer from offer_events table
+    cursor.execute("SELECT DISTINCT offer_id FROM offer_events")
+    offer_ids = [row[0] for row in cursor.fetchall()]
+
+    n_changed = 0
+    for offer_id in offer_ids:
+        status = _get_offer_status(cursor, offer_id)
+        if status is None:
+            continue
         cursor.execute(
-            "SELECT * FROM offer_events WHERE offer_id = ? ORDER BY event_timestamp ASC", 
-            (offer_id,)
+            "UPDATE offers SET status = ? WHERE offer_id = ? AND status IS NOT ?",
+            (status, offer_id, status)
         )
-        events = cursor.fetchall()
-        
-        # Add each event to the result list
-        for event in events:
-            # Convert the tuple to a dictionary using column names
-            event_dict = dict(zip([column[0] for column in cursor.description], event))
-            result.append(event_dict)
-        
-        # Sort all entries by blockchain order (block number and log index)
-        result = sorted(result, key=lambda event: (event['block_number'], event['log_index']))
-    
-    return result
\ No newline at end of file
+        n_changed += cursor.rowcount
+    return n_changed
@@ -0,0 +1,388 @@
+"""
+Schema migrations of the YAM events database.
+
+The schema version of a database is stored in 'PRAGMA user_version'. Databases created by
+init_db are stamped with SCHEMA_VERSION; databases created before a migration existed
+are brought up to date by applying, in order, every migration with a higher version.
+
+Each migration describes the change from the previous version only and must not be edited
+once released. The current schema is described in init_db.
+
+Migrations 5 and 6 are the exception: they fill the derived tables 'wallet_trades' and
+'address_activity' with the live rebuild helpers (_rebuild_wallet_trades,
+_rebuild_address_activity), so that they are built with the current rules (payment tokens,
+decimals). A change to these helpers therefore changes what these migrations do. The helpers
+must keep writing the columns these migrations create: a later migration that changes the
+schema of these tables must give migrations 5 and 6 frozen copies of the helpers.
+"""
+
+import sqlite3
+from typing import Callable, Dict, List
+from ._binary_codecs import _hex_to_bytes
+from ._wallet_trades import _rebuild_wallet_trades
+from ._address_activity import _rebuild_address_activity
+
+
+def _migration_1_report_covering_indexes(cursor: sqlite3.Cursor) -> None:
+    """
+    Replace the single-column report indexes with composite covering indexes.
+
+    The report query filters accepted events on buyer address and timestamp, or on the
+    offers of a seller address and timestamp. Each side is now answered by one index
+    without visiting the table rows.
+    """
+    cursor.execute("DROP INDEX IF EXISTS idx_offer_events_type_timestamp")
+    cursor.execute("DROP INDEX IF EXISTS idx_offer_events_buyer_address")
+    cursor.execute("DROP INDEX IF EXISTS idx_offers_seller_address")
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_offer_events_accepted_buyer
+    ON offer_events (buyer_address, event_timestamp, offer_id, amount_bought, price_bought, block_number, transaction_hash, unique_id, event_type)
+    WHERE event_type = 'OfferAccepted';
+    """)
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_offer_events_accepted_offer
+    ON offer_events (offer_id, event_timestamp, buyer_address, amount_bought, price_bought, block_number, transaction_hash, unique_id, event_type)
+    WHERE event_type = 'OfferAccepted';
+    """)
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_offers_seller_tokens
+    ON offers (seller_address, offer_token, buyer_token);
+    """)
+
+    # Give the query planner statistics on the new indexes
+    cursor.execute("ANALYZE")
+
+
+def _migration_2_numeric_shadow_columns(cursor: sqlite3.Cursor) -> None:
+    """
+    Add REAL shadow columns to the uint256 TEXT columns so that amounts and prices can be
+    summed and compared inside SQLite, and include them in the report covering indexes.
+    """
+    cursor.execute("ALTER TABLE offers ADD COLUMN initial_amount_num REAL NOT NULL DEFAULT 0")
+    cursor.execute("ALTER TABLE offers ADD COLUMN price_per_unit_num REAL NOT NULL DEFAULT 0")
+    cursor.execute("ALTER TABLE offer_events ADD COLUMN amount_num REAL")
+    cursor.execute("ALTER TABLE offer_events ADD COLUMN price_num REAL")
+    cursor.execute("ALTER TABLE offer_events ADD COLUMN amount_bought_num REAL")
+    cursor.execute("ALTER TABLE offer_events ADD COLUMN price_bought_num REAL")
+
+    cursor.execute("""
+    UPDATE offers SET
+        initial_amount_num = CAST(initial_amount AS REAL),
+        price_per_unit_num = CAST(price_per_unit AS REAL)
+    """)
+    cursor.execute("""
+    UPDATE offer_events SET
+        amount_num = CAST(amount AS REAL),
+        price_num = CAST(price AS REAL),
+        amount_bought_num = CAST(amount_bought AS REAL),
+        price_bought_num = CAST(price_bought AS REAL)
+    """)
+
+    cursor.execute("DROP INDEX IF EXISTS idx_offer_events_accepted_buyer")
+    cursor.execute("DROP INDEX IF EXISTS idx_offer_events_accepted_offer")
+    cursor.execute("DROP INDEX IF EXISTS idx_offer_events_offer_id")
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_offer_events_accepted_buyer
+    ON offer_events (buyer_address, event_timestamp, offer_id, amount_bought, price_bought, block_number, transaction_hash, amount_bought_num, price_bought_num, unique_id, event_type)
+    WHERE event_type = 'OfferAccepted';
+    """)
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_offer_events_accepted_offer
+    ON offer_events (offer_id, event_timestamp, buyer_address, amount_bought, price_bought, block_number, transaction_hash, amount_bought_num, price_bought_num, unique_id, event_type)
+    WHERE event_type = 'OfferAccepted';
+    """)
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_offer_events_offer_id_block
+    ON offer_events (offer_id, block_number, log_index);
+    """)
+
+    cursor.execute("ANALYZE")
+
+
+def _migration_3_binary_addresses_and_hashes(cursor: sqlite3.Cursor) -> None:
+    """
+    Store addresses once, as 20-byte BLOBs in an 'addresses' table referenced by integer ids,
+    and transaction hashes as 32-byte BLOBs. The 'unique_id' TEXT primary key of offer_events
+    is replaced by an integer 'event_id' and a unique constraint on (transaction_hash, log_index).
+
+    SQLite cannot change the type of a column, so both tables are rebuilt and their rows copied.
+    """
+    cursor.connection.create_function(
+        'hex_to_blob', 1, lambda value: _hex_to_bytes(value) if value is not None else None, deterministic=True
+    )
+
+    cursor.execute("""
+    CREATE TABLE addresses (
+        address_id INTEGER PRIMARY KEY,
+        address BLOB NOT NULL UNIQUE
+    );
+    """)
+
+    cursor.execute("""
+    INSERT OR IGNORE INTO addresses (address)
+    SELECT hex_to_blob(address) FROM (
+        SELECT seller_address AS address FROM offers
+        UNION SELECT offer_token FROM offers
+        UNION SELECT buyer_token FROM offers
+        UNION SELECT buyer_address FROM offer_events WHERE buyer_address IS NOT NULL
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE offers_new (
+        offer_id INTEGER PRIMARY KEY,
+        seller_address_id INTEGER NOT NULL,
+        initial_amount TEXT NOT NULL,
+        price_per_unit TEXT NOT NULL,
+        offer_token_id INTEGER NOT NULL,
+        buyer_token_id INTEGER NOT NULL,
+        status TEXT CHECK (status IN ('InProgress', 'SoldOut', 'Deleted') ) DEFAULT 'InProgress',
+        block_number INTEGER NOT NULL,
+        transaction_hash BLOB NOT NULL,
+        log_index INTEGER NOT NULL,
+        creation_timestamp DATETIME,
+        initial_amount_num REAL NOT NULL,
+        price_per_unit_num REAL NOT NULL,
+        FOREIGN KEY (seller_address_id) REFERENCES addresses (address_id),
+        FOREIGN KEY (offer_token_id) REFERENCES addresses (address_id),
+        FOREIGN KEY (buyer_token_id) REFERENCES addresses (address_id)
+    );
+    """)
+
+    cursor.execute("""
+    INSERT INTO offers_new (
+        offer_id, seller_address_id, initial_amount, price_per_unit, offer_token_id, buyer_token_id,
+        status, block_number, transaction_hash, log_index, creation_timestamp,
+        initial_amount_num, price_per_unit_num
+    )
+    SELECT
+        offer_id,
+        (SELECT address_id FROM addresses WHERE address = hex_to_blob(seller_address)),
+        initial_amount,
+        price_per_unit,
+        (SELECT address_id FROM addresses WHERE address = hex_to_blob(offer_token)),
+        (SELECT address_id FROM addresses WHERE address = hex_to_blob(buyer_token)),
+        status,
+        block_number,
+        hex_to_blob(transaction_hash),
+        log_index,
+        creation_timestamp,
+        initial_amount_num,
+        price_per_unit_num
+    FROM offers
+    """)
+
+    cursor.execute("""
+    CREATE TABLE offer_events_new (
+        event_id INTEGER PRIMARY KEY,
+        offer_id INTEGER NOT NULL,
+        event_type TEXT NOT NULL CHECK (event_type IN ('OfferCreated', 'OfferUpdated', 'OfferAccepted', 'OfferDeleted')),
+        amount TEXT,
+        price TEXT,
+        buyer_address_id INTEGER,
+        amount_bought TEXT,
+        block_number INTEGER NOT NULL,
+        transaction_hash BLOB NOT NULL,
+        log_index INTEGER NOT NULL,
+        price_bought TEXT,
+        event_timestamp DATETIME,
+        amount_num REAL,
+        price_num REAL,
+        amount_bought_num REAL,
+        price_bought_num REAL,
+        UNIQUE (transaction_hash, log_index),
+        FOREIGN KEY (offer_id) REFERENCES offers (offer_id),
+        FOREIGN KEY (buyer_address_id) REFERENCES addresses (address_id)
+    );
+    """)
+
+    # Events are copied in blockchain order so that event_id follows it
+    cursor.execute("""
+    INSERT INTO offer_events_new (
+        offer_id, event_type, amount, price, buyer_address_id, amount_bought, block_number,
+        transaction_hash, log_index, price_bought, event_timestamp,
+        amount_num, price_num, amount_bought_num, price_bought_num
+    )
+    SELECT
+        offer_id,
+        event_type,
+        amount,
+        price,
+        (SELECT address_id FROM addresses WHERE address = hex_to_blob(buyer_address)),
+        amount_bought,
+        block_number,
+        hex_to_blob(transaction_hash),
+        log_index,
+        price_bought,
+        event_timestamp,
+        amount_num,
+        price_num,
+        amount_bought_num,
+        price_bought_num
+    FROM offer_events
+    ORDER BY block_number, log_index
+    """)
+
+    # Dropping the old tables also drops their indexes
+    cursor.execute("DROP TABLE offer_events")
+    cursor.execute("DROP TABLE offers")
+    cursor.execute("ALTER TABLE offers_new RENAME TO offers")
+    cursor.execute("ALTER TABLE offer_events_new RENAME TO offer_events")
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_offer_events_accepted_buyer
+    ON offer_events (buyer_address_id, event_timestamp, offer_id, amount_bought, price_bought, block_number, transaction_hash, amount_bought_num, price_bought_num, event_type)
+    WHERE event_type = 'OfferAccepted';
+    """)
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_offers_seller_tokens
+    ON offers (seller_address_id, offer_token_id, buyer_token_id);
+    """)
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_offer_events_accepted_offer
+    ON offer_events (offer_id, event_timestamp, buyer_address_id, amount_bought, price_bought, block_number, transaction_hash, amount_bought_num, price_bought_num, event_type)
+    WHERE event_type = 'OfferAccepted';
+    """)
+
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_offer_events_offer_id_block
+    ON offer_events (offer_id, block_number, log_index);
+    """)
+
+    cursor.execute("ANALYZE")
+
+
+def _migration_4_integer_timestamps(cursor: sqlite3.Cursor) -> None:
+    """
+    Convert the 'YYYY-MM-DD HH:MM:SS' timestamp strings into integer Unix timestamps.
+
+    The strings were written in the server local time, which is UTC in the Docker image,
+    so they are converted as UTC. The DATETIME columns have NUMERIC affinity and store
+    the integers as such, so the tables do not need to be rebuilt; the indexes holding
+    event_timestamp are updated with the rows.
+    """
+    cursor.execute("""
+    UPDATE offers SET creation_timestamp = CAST(strftime('%s', creation_timestamp) AS INTEGER)
+    WHERE typeof(creation_timestamp) = 'text'
+    """)
+    cursor.execute("""
+    UPDATE offer_events SET event_timestamp = CAST(strftime('%s', event_timestamp) AS INTEGER)
+    WHERE typeof(event_timestamp) = 'text'
+    """)
+
+    cursor.execute("ANALYZE")
+
+
+def _migration_5_wallet_trades_ledger(cursor: sqlite3.Cursor) -> None:
+    """
+    Add the per-wallet trade ledger and fill it from the existing events, with the live
+    _rebuild_wallet_trades (see the module docstring).
+
+    Reports are now read from the ledger, so the report covering indexes of offers and
+    offer_events are no longer used and are dropped.
+    """
+    cursor.execute("""
+    CREATE TABLE wallet_trades (
+        wallet_id INTEGER NOT NULL,
+        event_timestamp INTEGER NOT NULL,
+        event_id INTEGER NOT NULL,
+        side TEXT NOT NULL CHECK (side IN ('buyer', 'seller', 'both')),
+        offer_type TEXT NOT NULL CHECK (offer_type IN ('sell', 'purchase', 'payment_exchange', 'realtoken_exchange')),
+        offer_token_id INTEGER NOT NULL,
+        buyer_token_id INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        price REAL NOT NULL,
+        total REAL NOT NULL,
+        transaction_hash BLOB NOT NULL,
+        PRIMARY KEY (wallet_id, event_timestamp, event_id),
+        FOREIGN KEY (wallet_id) REFERENCES addresses (address_id),
+        FOREIGN KEY (event_id) REFERENCES offer_events (event_id)
+    ) WITHOUT ROWID;
+    """)
+
+    _rebuild_wallet_trades(cursor)
+
+    cursor.execute("DROP INDEX IF EXISTS idx_offer_events_accepted_buyer")
+    cursor.execute("DROP INDEX IF EXISTS idx_offer_events_accepted_offer")
+    cursor.execute("DROP INDEX IF EXISTS idx_offers_seller_tokens")
+
+    cursor.execute("ANALYZE")
+
+
+def _migration_6_address_activity(cursor: sqlite3.Cursor) -> None:
+    """
+    Add the address activity summary (first and last trades, trades count as buyer and
+    as seller) and fill it from the wallet trades ledger, with the live
+    _rebuild_address_activity (see the module docstring).
+    """
+    cursor.execute("""
+    CREATE TABLE address_activity (
+        address_id INTEGER PRIMARY KEY,
+        first_trade_timestamp INTEGER NOT NULL,
+        last_trade_timestamp INTEGER NOT NULL,
+        buyer_trades_count INTEGER NOT NULL DEFAULT 0,
+        seller_trades_count INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (address_id) REFERENCES addresses (address_id)
+    );
+    """)
+
+    _rebuild_address_activity(cursor)
+
+
+MIGRATIONS: Dict[int, Callable[[sqlite3.Cursor], None]] = {
+    1: _migration_1_report_covering_indexes,
+    2: _migration_2_numeric_shadow_columns,
+    3: _migration_3_binary_addresses_and_hashes,
+    4: _migration_4_integer_timestamps,
+    5: _migration_5_wallet_trades_ledger,
+    6: _migration_6_address_activity,
+}
+
+SCHEMA_VERSION = max(MIGRATIONS)
+
+
+def _get_schema_version(cursor: sqlite3.Cursor) -> int:
+    cursor.execute("PRAGMA user_version")
+    return cursor.fetchone()[0]
+
+
+def _set_schema_version(cursor: sqlite3.Cursor, version: int) -> None:
+    # PRAGMA statements do not accept bound parameters
+    cursor.execute(f"PRAGMA user_version = {int(version)}")
+
+
+def _apply_migrations(conn: sqlite3.Connection) -> List[int]:
+    """
+    Apply all pending migrations, each one in its own transaction.
+
+    Args:
+        conn: Connection to the database to migrate
+
+    Returns:
+        List[int]: Versions of the migrations that have been applied
+    """
+    cursor = conn.cursor()
+    applied = []
+
+    for version in sorted(MIGRATIONS):
+        if version <= _get_schema_version(cursor):
+            continue
+        try:
+            cursor.execute("BEGIN")
+            MIGRATIONS[version](cursor)
+            _set_schema_version(cursor, version)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+
+    return applied
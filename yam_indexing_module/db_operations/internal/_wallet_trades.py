@@ -0,0 +1,188 @@
+"""
+Per-wallet trade ledger.
+
+The 'wallet_trades' table holds one row per (wallet, accepted event): the side of the wallet,
+the type of the offer and the amount, price and total already adjusted by the token decimals.
+It is maintained at ingest time so that a report is a single range scan on (wallet, timestamp).
+
+Payment tokens are the contracts of Ressources/blockchain_contracts.json that have decimals.
+Every other token is considered a realtoken, with 18 decimals unless overridden in
+REALTOKEN_DECIMALS_OVERRIDES. The API reads the adjusted values and does not use decimals.
+
+The adjusted values do not depend on the side of the wallet:
+- 'sell' offer (realtoken offered for a payment token):
+    amount = amount bought / 10^realtoken decimals
+    price = price / 10^payment token decimals
+- 'purchase' offer (payment token offered for a realtoken):
+    amount = amount bought x price / 10^(payment token decimals + realtoken decimals)
+    price = 10^realtoken decimals / price
+- 'payment_exchange' and 'realtoken_exchange' offers (two tokens of the same kind):
+    amount = amount bought / 10^offer token decimals
+    price = price / 10^buyer token decimals (exchange rate)
+and total = amount x price in every case.
+"""
+
+import json
+import sqlite3
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from ._address_activity import _update_address_activity
+
+# Resolved from the project root rather than the working directory: the ledger is also built by
+# the migrations, the bulk load and rebuild_wallet_trades, which can be run from anywhere
+BLOCKCHAIN_CONTRACTS_PATH = Path(__file__).resolve().parents[3] / 'Ressources' / 'blockchain_contracts.json'
+
+REALTOKEN_DEFAULT_DECIMALS = 18
+REALTOKEN_DECIMALS_OVERRIDES = {
+    bytes.fromhex('0675e8F4A52eA6c845CB6427Af03616a2af42170'): 9,  # RWA has 9 decimals and not 18
+}
+
+ACCEPTED_EVENTS_QUERY = """
+SELECT
+    offer_events.event_id,
+    offer_events.event_timestamp,
+    offer_events.transaction_hash,
+    offer_events.buyer_address_id,
+    offer_events.amount_bought,
+    offer_events.price_bought,
+    offers.seller_address_id,
+    offers.offer_token_id,
+    offers.buyer_token_id,
+    offer_token.address,
+    buyer_token.address
+FROM offer_events
+JOIN offers ON offers.offer_id = offer_events.offer_id
+JOIN addresses AS offer_token ON offer_token.address_id = offers.offer_token_id
+JOIN addresses AS buyer_token ON buyer_token.address_id = offers.buyer_token_id
+WHERE offer_events.event_type = 'OfferAccepted'
+"""
+
+INSERT_WALLET_TRADE_QUERY = """
+INSERT OR REPLACE INTO wallet_trades (
+    wallet_id, event_timestamp, event_id, side, offer_type, offer_token_id, buyer_token_id,
+    amount, price, total, transaction_hash
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+@lru_cache(maxsize=1)
+def _get_payment_token_decimals() -> Dict[bytes, int]:
+    """Return the decimals of the payment tokens, indexed by their 20-byte address."""
+    with open(BLOCKCHAIN_CONTRACTS_PATH, 'r') as f:
+        contracts = json.load(f)['contracts']
+    return {
+        bytes.fromhex(contract['address'][2:]): contract['decimals']
+        for contract in contracts.values() if 'decimals' in contract
+    }
+
+
+def _get_offer_type_and_values(
+    offer_token: bytes,
+    buyer_token: bytes,
+    amount_bought: int,
+    price_bought: int
+) -> Tuple[str, float, float, float]:
+    """
+    Classify an offer from its tokens and compute the decimals-adjusted amount, price and total of a trade.
+
+    Returns:
+        Tuple of the offer type, the amount, the price and the total
+    """
+    payment_token_decimals = _get_payment_token_decimals()
+    offer_token_decimals = payment_token_decimals.get(offer_token)
+    buyer_token_decimals = payment_token_decimals.get(buyer_token)
+
+    if offer_token_decimals is not None and buyer_token_decimals is not None:
+        offer_type = 'payment_exchange'
+        amount = amount_bought / 10 ** offer_token_decimals
+        price = price_bought / 10 ** buyer_token_decimals
+
+    elif offer_token_decimals is None and buyer_token_decimals is None:
+        offer_type = 'realtoken_exchange'
+        amount = amount_bought / 10 ** REALTOKEN_DECIMALS_OVERRIDES.get(offer_token, REALTOKEN_DEFAULT_DECIMALS)
+        price = price_bought / 10 ** REALTOKEN_DECIMALS_OVERRIDES.get(buyer_token, REALTOKEN_DEFAULT_DECIMALS)
+
+    elif buyer_token_decimals is not None:
+        offer_type = 'sell'
+        amount = amount_bought / 10 ** REALTOKEN_DECIMALS_OVERRIDES.get(offer_token, REALTOKEN_DEFAULT_DECIMALS)
+        price = price_bought / 10 ** buyer_token_decimals
+
+    else:
+        offer_type = 'purchase'
+        realtoken_decimals = REALTOKEN_DECIMALS_OVERRIDES.get(buyer_token, REALTOKEN_DEFAULT_DECIMALS)
+        amount = amount_bought * price_bought / 10 ** (offer_token_decimals + realtoken_decimals)
+        # A zero price cannot be converted into a price per realtoken
+        price = 10 ** realtoken_decimals / price_bought if price_bought != 0 else 0.0
+
+    return offer_type, amount, price, price * amount
+
+
+def _get_wallet_trade_rows(accepted_event: tuple) -> List[tuple]:
+    """
+    Build the wallet_trades rows of an accepted event, as returned by ACCEPTED_EVENTS_QUERY.
+    A trade between a wallet and itself gives a single row with the side 'both'.
+    """
+    (event_id, event_timestamp, transaction_hash, buyer_address_id, amount_bought, price_bought,
+     seller_address_id, offer_token_id, buyer_token_id, offer_token, buyer_token) = accepted_event
+
+    offer_type, amount, price, total = _get_offer_type_and_values(
+        bytes(offer_token), bytes(buyer_token), int(amount_bought), int(price_bought)
+    )
+
+    if buyer_address_id == seller_address_id:
+        sides = [(buyer_address_id, 'both')]
+    else:
+        sides = [(buyer_address_id, 'buyer'), (seller_address_id, 'seller')]
+
+    return [
+        (wallet_id, event_timestamp, event_id, side, offer_type, offer_token_id, buyer_token_id,
+         amount, price, total, transaction_hash)
+        for wallet_id, side in sides
+    ]
+
+
+def _add_wallet_trades(cursor: sqlite3.Cursor, event_id: int) -> None:
+    """
+    Add to the ledger the rows of an accepted event, and update the activity of its addresses.
+    Nothing is added if the offer of the event is not in the database.
+
+    Args:
+        cursor: Database cursor
+        event_id: event_id of the 'OfferAccepted' event in offer_events
+    """
+    cursor.execute(ACCEPTED_EVENTS_QUERY + "AND offer_events.event_id = ?", (event_id,))
+    accepted_event: Optional[tuple] = cursor.fetchone()
+    if accepted_event is None:
+        return
+    wallet_trade_rows = _get_wallet_trade_rows(accepted_event)
+    cursor.executemany(INSERT_WALLET_TRADE_QUERY, wallet_trade_rows)
+    _update_address_activity(cursor, wallet_trade_rows)
+
+
+def _rebuild_wallet_trades(cursor: sqlite3.Cursor) -> int:
+    """
+    Rebuild the whole ledger from the offers and offer_events tables.
+    The address activity table derived from it is not rebuilt (see _rebuild_address_activity).
+
+    Args:
+        cursor: Database cursor
+
+    Returns:
+        int: Number of rows in the ledger
+    """
+    cursor.execute("DELETE FROM wallet_trades")
+
+    # A second cursor reads the accepted events while the first one inserts the rows
+    read_cursor = cursor.connection.cursor()
+    read_cursor.execute(ACCEPTED_EVENTS_QUERY)
+    n_rows = 0
+    while True:
+        accepted_events = read_cursor.fetchmany(10000)
+        if not accepted_events:
+            break
+        rows = [row for accepted_event in accepted_events for row in _get_wallet_trade_rows(accepted_event)]
+        cursor.executemany(INSERT_WALLET_TRADE_QUERY, rows)
+        n_rows += len(rows)
+
+    return n_rows
@@ -0,0 +1,141 @@
+import sqlite3
+import logging
+import time
+from typing import Dict, Optional
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Minimum time in seconds between two runs of each maintenance task
+INCREMENTAL_VACUUM_INTERVAL = 600
+ANALYZE_INTERVAL = 6 * 3600
+WAL_CHECKPOINT_INTERVAL = 60
+
+INCREMENTAL_VACUUM_STEP = 256   # Number of free pages released by each incremental vacuum step
+ANALYSIS_LIMIT = 1000           # Approximate number of rows of each index examined by ANALYZE
+ANALYZE_MIN_BUDGET = 2.0        # ANALYZE cannot be interrupted: it only runs with at least this time left (seconds)
+
+
+class MaintenanceScheduler:
+    """
+    Run the database maintenance in the idle windows of the indexing loop.
+
+    Each call to run() does the tasks that are due, within a time budget, so that the
+    maintenance never delays the tracking of the chain head:
+    - incremental vacuum: releases the free pages of the database file by small steps
+      (only for databases with auto_vacuum = INCREMENTAL, see enable_incremental_vacuum)
+    - ANALYZE with an analysis limit: keeps the statistics of the query planner up to date
+      at a bounded cost
+    - passive WAL checkpoint: copies the WAL back into the database without blocking
+      the readers (only for databases in WAL mode)
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._last_runs = {'incremental_vacuum': 0.0, 'analyze': 0.0, 'wal_checkpoint': 0.0}
+
+    def _is_due(self, task: str, interval: float, now: float) -> bool:
+        return now - self._last_runs[task] >= interval
+
+    def run(self, time_budget: float) -> Optional[Dict]:
+        """
+        Run the maintenance tasks that are due within a time budget.
+
+        Args:
+            time_budget: Maximum time to spend, in seconds
+
+        Returns:
+            Optional[Dict]: Report of the tasks run (reclaimed pages, checkpointed frames,
+            duration), or None if no task was due
+        """
+        start_time = time.time()
+        deadline = start_time + time_budget
+        if not any(
+            self._is_due(task, interval, start_time)
+            for task, interval in (
+                ('incremental_vacuum', INCREMENTAL_VACUUM_INTERVAL),
+                ('analyze', ANALYZE_INTERVAL),
+                ('wal_checkpoint', WAL_CHECKPOINT_INTERVAL),
+            )
+        ):
+            return None
+
+        report = {'tasks': []}
+        conn = sqlite3.connect(self.db_path)
+        # Each statement is its own transaction: the indexer is never blocked for long
+        conn.isolation_level = None
+        try:
+            cursor = conn.cursor()
+
+            if self._is_due('incremental_vacuum', INCREMENTAL_VACUUM_INTERVAL, time.time()):
+                cursor.execute("PRAGMA auto_vacuum")
+                if cursor.fetchone()[0] == 2:  # INCREMENTAL
+                    cursor.execute("PRAGMA freelist_count")
+                    freelist_before = freelist_count = cursor.fetchone()[0]
+                    while freelist_count > 0 and time.time() < deadline:
+                        cursor.execute(f"PRAGMA incremental_vacuum({INCREMENTAL_VACUUM_STEP})").fetchall()
+                        cursor.execute("PRAGMA freelist_count")
+                        freelist_count = cursor.fetchone()[0]
+                    report['reclaimed_pages'] = freelist_before - freelist_count
+                    report['free_pages'] = freelist_count
+                    report['tasks'].append('incremental_vacuum')
+                    # The task is done again at the next window if the budget was not enough
+                    if freelist_count == 0:
+                        self._last_runs['incremental_vacuum'] = time.time()
+                else:
+                    self._last_runs['incremental_vacuum'] = time.time()
+
+            if self._is_due('analyze', ANALYZE_INTERVAL, time.time()) and deadline - time.time() >= ANALYZE_MIN_BUDGET:
+                cursor.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+                cursor.execute("ANALYZE")
+                self._last_runs['analyze'] = time.time()
+                report['tasks'].append('analyze')
+
+            if self._is_due('wal_checkpoint', WAL_CHECKPOINT_INTERVAL, time.time()) and time.time() < deadline:
+                cursor.execute("PRAGMA journal_mode")
+                if cursor.fetchone()[0] == 'wal':
+                    cursor.execute("PRAGMA wal_checkpoint(PASSIVE)")
+                    _, wal_frames, checkpointed_frames = cursor.fetchone()
+                    report['wal_frames'] = wal_frames
+                    report['checkpointed_frames'] = checkpointed_frames
+                    report['tasks'].append('wal_checkpoint')
+                self._last_runs['wal_checkpoint'] = time.time()
+
+        finally:
+            conn.close()
+
+        report['duration'] = round(time.time() - start_time, 3)
+        if report['tasks']:
+            logger.info(f"Database maintenance: {report}")
+        return report
+
+
+def enable_incremental_vacuum(db_path: str) -> None:
+    """
+    Switch an existing database to auto_vacuum = INCREMENTAL, so that the maintenance can
+    release its free pages. The whole database is rebuilt by VACUUM: this should be done while
+    the indexing service is stopped. Databases created by init_db already use this mode.
+
+    Args:
+        db_path: Path to the SQLite database file
+    """
+    conn = sqlite3.connect(db_path)
+    conn.isolation_level = None
+    try:
+        start_time = time.time()
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        logger.info(f"Incremental vacuum enabled on {db_path} in {time.time() - start_time:.1f}s")
+        print("Incremental vacuum enabled.")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    import json
+    with open('config.json', 'r') as f:
+        DB_PATH = json.load(f)['db_path']
+    enable_incremental_vacuum(DB_PATH)
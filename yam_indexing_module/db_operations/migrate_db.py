@@ -0,0 +1,34 @@
+import sqlite3
+import logging
+from .internal._migrations import _apply_migrations, _get_schema_version, SCHEMA_VERSION
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+def migrate_db(db_path: str) -> None:
+    """
+    Bring an existing database up to the current schema version.
+
+    Migrations are tracked with 'PRAGMA user_version', so calling this function on an
+    up-to-date database does nothing.
+
+    Args:
+        db_path: Path to the SQLite database file
+    """
+    conn = sqlite3.connect(db_path)
+    # Transactions are handled explicitly by the migrations
+    conn.isolation_level = None
+
+    try:
+        current_version = _get_schema_version(conn.cursor())
+        if current_version >= SCHEMA_VERSION:
+            return
+
+        print(f"Migrating database from schema version {current_version} to {SCHEMA_VERSION}...")
+        applied = _apply_migrations(conn)
+        logger.info(f"Database migrated to schema version {SCHEMA_VERSION} - migrations applied: {applied}")
+        print("Database migration completed.")
+
+    finally:
+        conn.close()
@@ -0,0 +1,40 @@
+import os
+import sqlite3
+import logging
+import time
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+def publish_snapshot(db_path: str, snapshot_path: str) -> None:
+    """
+    Publish a consistent read-only snapshot of the database for the API.
+
+    The snapshot is copied with the SQLite online backup API into a temporary file next to
+    the snapshot, which then atomically replaces the previous snapshot. The API opens the
+    snapshot as immutable: a published file is never modified, and readers still using the
+    previous snapshot keep reading it until they reconnect.
+
+    Args:
+        db_path: Path to the SQLite database file written by the indexer
+        snapshot_path: Path of the snapshot read by the API
+    """
+    start_time = time.time()
+    tmp_path = f"{snapshot_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    source = sqlite3.connect(db_path)
+    destination = sqlite3.connect(tmp_path)
+    try:
+        # All the pages are copied in one step, so the snapshot is a consistent state of the database
+        source.backup(destination)
+    finally:
+        destination.close()
+        source.close()
+
+    os.chmod(tmp_path, 0o444)
+    os.replace(tmp_path, snapshot_path)
+
+    logger.info(f"Snapshot published to {snapshot_path} - {os.path.getsize(snapshot_path) / 1e6:.1f} MB in {time.time() - start_time:.2f}s")
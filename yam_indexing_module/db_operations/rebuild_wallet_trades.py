@@ -0,0 +1,46 @@
+import sqlite3
+import logging
+import time
+from .internal._wallet_trades import _rebuild_wallet_trades
+from .internal._address_activity import _rebuild_address_activity
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+def rebuild_wallet_trades(db_path: str) -> None:
+    """
+    Rebuild the per-wallet trade ledger ('wallet_trades' table) from the offers and offer_events tables,
+    and the address activity table derived from it.
+
+    The ledger is maintained at ingest time; rebuilding it is only needed when its content
+    is not trusted anymore (e.g. events added before their offer, or a change in the
+    payment tokens of Ressources/blockchain_contracts.json).
+
+    Args:
+        db_path: Path to the SQLite database file
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        print("Rebuilding the wallet trades ledger...")
+        start_time = time.time()
+        n_rows = _rebuild_wallet_trades(cursor)
+        n_addresses = _rebuild_address_activity(cursor)
+        conn.commit()
+        logger.info(f"Wallet trades ledger rebuilt - {n_rows} rows, {n_addresses} active addresses in {time.time() - start_time:.1f}s")
+        print(f"Wallet trades ledger rebuilt: {n_rows} rows, {n_addresses} active addresses.")
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    import json
+    with open('config.json', 'r') as f:
+        DB_PATH = json.load(f)['db_path']
+    rebuild_wallet_trades(DB_PATH)
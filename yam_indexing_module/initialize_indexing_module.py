@@ -1,7 +1,10 @@
 import json
+import os
 import sqlite3
 from yam_indexing_module.the_graphe_handler.internals import fetch_all_offer_created, fetch_all_offer_deleted, fetch_all_offer_updated, fetch_all_offer_accepted
-from yam_indexing_module.db_operations import add_events_to_db, init_db
+from yam_indexing_module.db_operations import add_events_to_db, init_db, bulk_load_db
+
+FIRST_YAM_BLOCK = 25530394  # Block of the YAM contract deployment
 
 
 def initialize_indexing_module():
@@ -12,35 +15,40 @@ def initialize_indexing_module():
     DB_PATH = config["db_path"]
     SUBGRAPH_URL = config['subgraph_url']
 
-    # initialize DB
-    init_db(DB_PATH)
-
-    # Fetch from TheGraph all offerCreated and add them to the DB
+    # Fetch from TheGraph all offerCreated
     print("\nofferCreated:")
     created_offers = fetch_all_offer_created(API_KEY, SUBGRAPH_URL)
-    add_events_to_db(DB_PATH, None, None, created_offers, True)
 
-    # Fetch from TheGraph all offerAccepted/offerDeleted/offerUpdated and add them to the DB
+    # Fetch from TheGraph all offerAccepted/offerDeleted/offerUpdated
     print("\n\nofferAccepted, offerUpdated and offerDeleted:")
     accepted_offers = fetch_all_offer_accepted(API_KEY, SUBGRAPH_URL)
     updated_offers = fetch_all_offer_updated(API_KEY, SUBGRAPH_URL)
     deleted_offers = fetch_all_offer_deleted(API_KEY, SUBGRAPH_URL)
     all_events = accepted_offers + updated_offers + deleted_offers
     all_events_sorted = sorted(all_events, key=lambda x: x['timestamp'])
-    add_events_to_db(DB_PATH, None, None, all_events_sorted, True)
 
     highest_block_number = max(created_offers[-1]['blockNumber'], all_events_sorted[-1]['blockNumber'])
-    
-    # Add indexing state record
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO indexing_state (from_block, to_block) 
-        VALUES (?, ?)
-    """, (25530394, highest_block_number))
-    conn.commit()
-    conn.close()
+
+    if not os.path.exists(DB_PATH):
+        # New DB: load the whole history at once, then build the indexes and derived tables
+        print("\n\nLoading the events into a new DB:")
+        bulk_load_db(DB_PATH, [created_offers, all_events_sorted], FIRST_YAM_BLOCK, highest_block_number)
+    else:
+        # Existing DB: add the events one by one, the ones already in the DB are skipped
+        init_db(DB_PATH)
+        print("\n\nAdding the events to the existing DB:")
+        add_events_to_db(DB_PATH, None, None, created_offers, True)
+        add_events_to_db(DB_PATH, None, None, all_events_sorted, True)
+
+        # Add indexing state record
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO indexing_state (from_block, to_block) 
+            VALUES (?, ?)
+        """, (FIRST_YAM_BLOCK, highest_block_number))
+        conn.commit()
+        conn.close()
 
     print(f'\nInitialization completed! DB indexed up to block {highest_block_number}')
 
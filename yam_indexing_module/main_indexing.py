@@ -7,7 +7,7 @@ from pprint import pprint
 from yam_indexing_module.the_graphe_handler import backfill_db_block_range
 from yam_indexing_module.db_operations.internal._db_operations import _get_last_indexed_block
 from yam_indexing_module.logs_handlers.get_and_decode_logs_yam import get_raw_logs_yam, decode_raw_logs_yam
-from yam_indexing_module.db_operations import add_events_to_db
+from yam_indexing_module.db_operations import add_events_to_db, migrate_db, publish_snapshot, export_parquet, MaintenanceScheduler
 from yam_indexing_module.logging.logging_config import setup_logging
 
 
@@ -17,6 +17,10 @@ BLOCK_BUFFER = 5                        # Gap between the latest block available
 TIME_TO_WAIT_BEFORE_RETRY = 1.5         # time to wait before retry when RPC is not available
 MAX_RETRIES_PER_BLOCK_RANGE = 6         # Number of time the request will be retried when it has failed before changing the RPC
 COUNT_PERIODIC_BACKFILL_THEGRAPH = 960  # Number of iteration before backfilling the blocks into the DB the blocks of the last few hours (with TheGraph)
+SNAPSHOT_INTERVAL = 60                  # Minimum time in seconds between two read-only snapshots of the DB published for the API
+SNAPSHOT_MAX_TIME_SHARE = 0.05          # Maximum share of the time of the indexing loop spent copying snapshots (a snapshot copies the whole DB)
+PARQUET_EXPORT_INTERVAL = 3600          # Minimum time in seconds between two incremental Parquet exports
+MAINTENANCE_TIME_BUDGET = 5             # Maximum time in seconds spent on DB maintenance per iteration (never more than half of the idle time)
 
 
 def main_indexing():
@@ -38,9 +42,14 @@ def main_indexing():
     db_path = config['db_path']
     subgraph_url = config['subgraph_url']
     the_graph_api_key = config['the_graph_api_key']
+    snapshot_path = config.get('snapshot_path') # optional: the API reads the live DB when not set
+    parquet_export_dir = config.get('parquet_export_dir') # optional: no Parquet export when not set
 
     #### INITIALIZATION ####
 
+    # Bring the database schema up to date (new indexes, storage format changes...)
+    migrate_db(db_path)
+
     w3_indice = 0
     w3 = Web3(Web3.HTTPProvider(w3_urls[w3_indice]))
 
@@ -50,6 +59,16 @@ def main_indexing():
     # backfill DB from the last indexed block in DB to the latest available block in the blockchain
     backfill_db_block_range(db_path, subgraph_url, the_graph_api_key, last_block_indexed, latest_block_number)
 
+    snapshot_start_time = time.time()
+    if snapshot_path:
+        publish_snapshot(db_path, snapshot_path)
+    # The bigger the DB, the longer its copy: the interval between two snapshots grows with it
+    snapshot_interval = max(SNAPSHOT_INTERVAL, (time.time() - snapshot_start_time) / SNAPSHOT_MAX_TIME_SHARE)
+    last_snapshot_time = time.time()
+    snapshot_pending = False # new events not in the published snapshot yet
+    last_parquet_export_time = 0
+    maintenance_scheduler = MaintenanceScheduler(db_path)
+
     from_block = latest_block_number - BLOCK_BUFFER - BLOCK_TO_RETRIEVE + 1
     to_block = latest_block_number - BLOCK_BUFFER
     sync_counter = 0
@@ -96,6 +115,8 @@ def main_indexing():
             ### Add logs to the DB
             add_events_to_db(db_path, from_block, to_block, decoded_logs)
             logger.info(f"{len(decoded_logs)} YAM log(s) retrieved from block {from_block} to {to_block}")
+            if decoded_logs:
+                snapshot_pending = True
         
             from_block = to_block + 1
             to_block += BLOCK_TO_RETRIEVE
@@ -120,10 +141,41 @@ def main_indexing():
                 # backfill DB from the last indexed block in DB to the latest available block in the blockchain
                 from_block_backfill = to_block - 17280 # 17280 blocks = 1 day
                 backfill_db_block_range(db_path, subgraph_url, the_graph_api_key, from_block_backfill, to_block)
+                snapshot_pending = True
+
+            # Publish a new read-only snapshot of the DB for the API, only if new events were indexed
+            if snapshot_path and snapshot_pending and time.time() - last_snapshot_time > snapshot_interval:
+                last_snapshot_time = time.time()
+                try:
+                    publish_snapshot(db_path, snapshot_path)
+                    snapshot_pending = False
+                except Exception as e:
+                    logger.error(f"Snapshot publication failed: {e}")
+                snapshot_interval = max(SNAPSHOT_INTERVAL, (time.time() - last_snapshot_time) / SNAPSHOT_MAX_TIME_SHARE)
+
+            # Export the newly indexed blocks to the Parquet dataset
+            if parquet_export_dir and time.time() - last_parquet_export_time > PARQUET_EXPORT_INTERVAL:
+                last_parquet_export_time = time.time()
+                try:
+                    export_parquet(db_path, parquet_export_dir)
+                except ImportError as e:
+                    # pyarrow is not installed: reported once, the export is not tried again
+                    logger.error(f"Parquet export disabled - {e}")
+                    parquet_export_dir = None
+                except Exception as e:
+                    logger.error(f"Parquet export failed: {e}")
             
             # Adjust sleep time accordingly - we don't want to deviate so we take the execution time into account
             execution_time = time.time() - start_time
             time_to_sleep = max(0, BLOCK_TO_RETRIEVE * 5.1 - execution_time) # 5.1 because it seems to go too fast with 5 and it ends up fetching block that doesn't exist yet
+
+            # Use the idle time for the DB maintenance, without delaying the next iteration
+            try:
+                maintenance_start_time = time.time()
+                maintenance_scheduler.run(min(MAINTENANCE_TIME_BUDGET, time_to_sleep / 2))
+                time_to_sleep = max(0, time_to_sleep - (time.time() - maintenance_start_time))
+            except Exception as e:
+                logger.error(f"Database maintenance failed: {e}")
             
             # Sleep for the adjusted time
             time.sleep(time_to_sleep)